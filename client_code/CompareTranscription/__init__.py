@@ -59,7 +59,8 @@ class CompareTranscription(CompareTranscriptionTemplate):
       try:
         Notification("Attempting server comparison...", timeout=1).show()
         # Set a short timeout to fail quickly if server has issues
-        result = anvil.server.call("compare_transcriptions", user_text, official_text, _timeout=2)
+        result = anvil.server.call("compare_transcriptions_comparer", user_text, official_text,
+                                   language=selected_lang, _timeout=2)
         
         if result and 'html' in result and 'stats' in result:
           # If we got a valid result, display it
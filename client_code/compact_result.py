@@ -0,0 +1,24 @@
+# Decoder for the compact result of validate_transcription_comparer(..., compact=True).
+# Keep TYPE_NAMES in the order of server_code/comparer/results.py.
+TYPE_NAMES = ('correct', 'mistake', 'missing', 'wrong')
+
+
+def decode_compact_result(payload, user_input, actual_transcript):
+  """Rebuild the [{'text', 'type'}] list by slicing the two strings that were sent to the server."""
+  sources = (user_input, actual_transcript)
+  last_end = [0, 0]
+  offsets = payload['offsets']
+  runs = payload['runs']
+  entries = []
+  k = 0
+  for r in range(0, len(runs), 2):
+    word_type = TYPE_NAMES[runs[r]]
+    side = 1 if word_type == 'missing' else 0
+    source = sources[side]
+    for _ in range(runs[r + 1]):
+      start = last_end[side] + offsets[k]
+      end = start + offsets[k + 1]
+      k += 2
+      entries.append({'text': source[start:end], 'type': word_type})
+      last_end[side] = end
+  return entries
@@ -1,58 +1,33 @@
 import anvil.server
-import re
+from comparer import DEFAULT_LANGUAGE, TranscriptionComparerV4Pro, OffsetRealign, HtmlResult, prepare_transcript
 
-def normalize_words(text):
-  return text.lower().replace(".", "").replace(",", "").replace("!", "").replace("?", "").split()
+COLORS = {'correct': 'lightgreen', 'missing': 'lightblue', 'wrong': 'lightcoral'}
 
 class SmartComparer:
-  def __init__(self, user_input, official_transcript):
-    self.user_words = normalize_words(user_input)
-    self.official_words = normalize_words(official_transcript)
+  """Strict comparison: exact (or equivalent) words only, resyncing within a few words."""
+
+  def __init__(self, user_input, official_transcript, language=DEFAULT_LANGUAGE):
+    self.prepared = prepare_transcript(official_transcript, language=language)
+    self.user = self.prepared.user_tokens(user_input)
+    self.engine = TranscriptionComparerV4Pro(mistake_threshold=None, strategies=(OffsetRealign(max_offset=3),),
+                                             language=language)
     self.result = ""
     self.correct = 0
     self.incorrect = 0
     self.missing = 0
 
   def compare(self):
-    i, j = 0, 0
-    while j < len(self.official_words) or i < len(self.user_words):
-      if i < len(self.user_words) and j < len(self.official_words) and self.user_words[i] == self.official_words[j]:
-        self.result += f"<span style='color: lightgreen'>{self.official_words[j]}</span> "
-        self.correct += 1
-        i += 1
-        j += 1
-        continue
-
-      # Tentativa de realinhamento leve
-      realigned = False
-      for offset in range(1, 4):
-        if i + offset < len(self.user_words) and j + offset < len(self.official_words):
-          if self.user_words[i + offset] == self.official_words[j + offset]:
-            for k in range(offset):
-              if j + k < len(self.official_words):
-                self.result += f"<span style='color: lightblue'>{self.official_words[j + k]}</span> "
-                self.missing += 1
-            i += offset
-            j += offset
-            realigned = True
-            break
-      if realigned:
-        continue
-
-      if i < len(self.user_words):
-        self.result += f"<span style='color: lightcoral'>{self.user_words[i]}</span> "
-        self.incorrect += 1
-        i += 1
-
-      if j < len(self.official_words):
-        self.result += f"<span style='color: lightblue'>{self.official_words[j]}</span> "
-        self.missing += 1
-        j += 1
+    render = HtmlResult(COLORS)
+    self.result = self.engine.compare_tokens(self.user, self.prepared.actual, index=self.prepared.index,
+                                             result=render)["html"]
+    self.correct = render.counts['correct']
+    self.incorrect = render.counts['wrong']
+    self.missing = render.counts['missing']
 
     total = self.correct + self.incorrect + self.missing
     accuracy = round((self.correct / total) * 100, 1) if total else 0
     return {
-      "html": self.result.strip(),
+      "html": self.result,
       "stats": {
         "accuracy": accuracy,
         "correct": self.correct,
@@ -63,5 +38,5 @@ class SmartComparer:
     }
 
 @anvil.server.callable
-def compare_transcriptions_simple(user_text, official_text):
-  return SmartComparer(user_text, official_text).compare()
+def compare_transcriptions_simple(user_text, official_text, language=DEFAULT_LANGUAGE):
+  return SmartComparer(user_text, official_text, language).compare()
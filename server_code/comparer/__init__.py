@@ -0,0 +1,25 @@
+"""
+The transcription comparison engine shared by every compare callable.
+
+Preprocessing, equivalence and fuzzy matching live here once; the callables in
+transcription_comparer, TranscriptionAdvanced and TranscriptionService only choose an
+engine configuration and format the result.
+"""
+from .cache import LRUCache, SimilarityCache, SIMILARITY_CACHE
+from .languages import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE, LanguagePack, language_pack
+from .tokens import Word, Vocabulary, TokenStore, TokenSpan, BigramIndex
+from .fuzzy import FuzzyMatcher
+from .gapmatrix import GAP_MATRIX_MIN_PAIRS, fuzzy_candidates, phonetic_pairs, resolve_gap
+from .profiling import SLOW_COMPARE_MS, CompareProfile, record_slow_compare
+from .phonetic import phonetic_key, sound_key, sounds_alike, PhoneticIndex
+from .strategies import GreedyBigramRealign, LinearFallbackRealign, OffsetRealign, PhoneticRealign
+from .engine import (DEFAULT_WORK_BUDGET, DEGRADED_STRATEGIES, AlignmentState, TranscriptionComparerV4Pro, DiffComparer,
+                     TimedComparer, COMPARE_MODES)
+from .preprocess import (WORD_RE, scan_words, prepare_actual, interpolate_word_timestamps, tokenize_user,
+                         PREPARED_TRANSCRIPT_VERSION, transcript_hash, PreparedTranscript, PREPARED_TRANSCRIPTS,
+                         find_prepared_transcript, prepare_transcript)
+from .results import (TYPE_NAMES, ResultSink, EntryList, CompactResult, HtmlResult, TimestampColumns, build_stats,
+                      summarize_result)
+from .incremental import IncrementalComparer
+from .batch import BATCH_POOL_MIN_SIZE, MAX_BATCH_SIZE, grade_batch
+from .parallel import PARALLEL_MIN_WORDS, find_anchors, AnchorSplitComparer
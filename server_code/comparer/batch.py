@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from .engine import COMPARE_MODES
+from .preprocess import tokenize_user
+from .results import EntryList, summarize_result
+from .tokens import TokenStore
+
+# Batches at least this large are graded in a process pool.
+BATCH_POOL_MIN_SIZE = 8
+# Largest batch grade_transcriptions_batch accepts in one call.
+MAX_BATCH_SIZE = 500
+
+_batch_actual: Optional[TokenStore] = None
+_batch_mode = 'greedy'
+
+
+def _grade_submission(user_input: str, actual: TokenStore, mode: str) -> Dict:
+  user = tokenize_user(user_input, actual.vocab.fork())
+  entries = EntryList()
+  result = COMPARE_MODES[mode](language=actual.vocab.pack.code).compare_tokens(user, actual, result=entries)
+  return {'result': result, 'stats': summarize_result(result), 'degraded': entries.degraded}
+
+
+def _init_batch_worker(actual: TokenStore, mode: str):
+  global _batch_actual, _batch_mode
+  _batch_actual, _batch_mode = actual, mode
+
+
+def _grade_in_worker(user_input: str) -> Dict:
+  return _grade_submission(user_input, _batch_actual, _batch_mode)
+
+
+def grade_batch(user_inputs: List[str], actual: TokenStore, mode: str = 'greedy',
+                max_workers: Optional[int] = None) -> List[Dict]:
+  """
+  Grade every submission against the prepared transcript, in input order. Large batches
+  are spread over a process pool of at most one worker per CPU; if processes are not
+  available the batch runs serially.
+  """
+  cpus = os.cpu_count() or 1
+  workers = min(max_workers, cpus) if max_workers else cpus
+  if len(user_inputs) >= BATCH_POOL_MIN_SIZE and workers > 1:
+    try:
+      with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(actual, mode)) as pool:
+        return list(pool.map(_grade_in_worker, user_inputs, chunksize=max(1, len(user_inputs) // 32)))
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+      print(f"Process pool unavailable, grading batch serially: {e}")
+
+  return [_grade_submission(user_input, actual, mode) for user_input in user_inputs]
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from typing import Dict
+
+
+class LRUCache:
+  """Bounded least-recently-used mapping with hit/miss counters; None is never a stored value."""
+
+  def __init__(self, max_entries: int):
+    self.max_entries = max_entries
+    self.hits = 0
+    self.misses = 0
+    self._entries: OrderedDict = OrderedDict()
+
+  def get(self, key):
+    value = self._entries.get(key)
+    if value is None:
+      self.misses += 1
+      return None
+    self._entries.move_to_end(key)
+    self.hits += 1
+    return value
+
+  def put(self, key, value):
+    self._entries[key] = value
+    self._entries.move_to_end(key)
+    while len(self._entries) > self.max_entries:
+      self._entries.popitem(last=False)
+
+  def clear(self):
+    self._entries.clear()
+    self.hits = 0
+    self.misses = 0
+
+  def stats(self) -> Dict[str, int]:
+    return {
+      'entries': len(self._entries),
+      'max_entries': self.max_entries,
+      'hits': self.hits,
+      'misses': self.misses
+    }
+
+
+class SimilarityCache(LRUCache):
+  """
+  Bounded LRU of word-pair decisions, shared by every compare run in this server worker.
+
+  Keys are (user_norm, actual_norm, threshold): the fuzzy mistake decisions of
+  TranscriptionComparerV4Pro.is_mistake. Equivalence is read from the vocabulary's masks
+  and never cached.
+  """
+
+  def __init__(self, max_entries: int = 100000):
+    super().__init__(max_entries)
+
+
+SIMILARITY_CACHE = SimilarityCache()
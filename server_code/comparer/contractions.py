@@ -0,0 +1,50 @@
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+_KEY_STRIP_RE = re.compile(r"[^\w\s']")
+
+
+def contraction_key(text: str) -> str:
+  """Lowercased token with punctuation removed but apostrophes kept, the way the trie's paths are spelled."""
+  return _KEY_STRIP_RE.sub('', text.replace('’', "'")).lower().strip("'")
+
+
+class ContractionTrie:
+  """
+  Token trie over the multi-word and apostrophe forms of an equivalence table.
+
+  match() finds the longest form starting at a position and returns its group's
+  canonical key, so "I am", "I'm" and "i'm" all become the single token "i am". A walk
+  never goes deeper than the longest form, so a left-to-right pass is linear.
+  """
+
+  def __init__(self, groups: Dict[str, List[str]], key: Callable[[str], str] = contraction_key):
+    self.root: Dict = {}
+    self.depth = 0
+    for canonical, forms in groups.items():
+      for form in forms:
+        path = [key(token) for token in form.split()]
+        # Bare suffixes ("'m", "n't") never stand alone after tokenization.
+        if form.startswith("'") or (len(path) == 1 and "'" not in path[0]):
+          continue
+        node = self.root
+        for token in path:
+          node = node.setdefault(token, {})
+        node[None] = key(canonical)
+        self.depth = max(self.depth, len(path))
+
+  def match(self, keys: Sequence[str], start: int) -> Tuple[int, Optional[str], bool]:
+    """
+    (length, canonical, open) for the longest form starting at keys[start]; (0, None, open)
+    when there is none. open is True when keys ran out while a longer form was still possible.
+    """
+    node = self.root
+    length, canonical = 0, None
+    for i in range(start, min(len(keys), start + self.depth)):
+      node = node.get(keys[i])
+      if node is None:
+        return length, canonical, False
+      if None in node:
+        length, canonical = i - start + 1, node[None]
+    return length, canonical, start + self.depth > len(keys) and len(node) > (None in node)
+
@@ -0,0 +1,493 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence
+from .cache import SimilarityCache, SIMILARITY_CACHE
+from .fuzzy import FuzzyMatcher
+from .gapmatrix import GAP_MATRIX_MIN_PAIRS, resolve_gap
+from .languages import DEFAULT_LANGUAGE
+from .phonetic import PhoneticIndex, sounds_alike
+from .profiling import CompareProfile
+from .results import ResultSink, EntryList
+from .strategies import GreedyBigramRealign, OffsetRealign, PhoneticRealign
+from .tokens import Word, Vocabulary, TokenStore, TokenSpan, BigramIndex
+
+
+# Units of alignment work (bigram lookups, gap pairs, diff steps) one compare may spend before
+# it degrades to a linear fallback; a few seconds of work at worst.
+DEFAULT_WORK_BUDGET = 2_000_000
+
+# What the greedy engines resync with once the budget is spent: a constant amount of work per mismatch.
+DEGRADED_STRATEGIES = (OffsetRealign(max_offset=3),)
+
+
+@dataclass
+class AlignmentState:
+  user_idx: int = 0
+  actual_idx: int = 0
+  matched_once: bool = False
+
+class TranscriptionComparerV4Pro:
+  """
+  Greedy word alignment: walk both sides while words are equivalent (or close enough to be
+  a mistake) and, on a mismatch, ask each realign strategy in turn to resync.
+
+  A mistake_threshold of None turns off fuzzy mistake matching altogether. With
+  profile=True every compare_tokens call leaves a CompareProfile in self.profile.
+
+  A compare that spends more than work_budget units of resync work (None for no limit)
+  finishes with DEGRADED_STRATEGIES instead of self.strategies and with unpaired gaps,
+  so noisy or unrelated input costs linear time; the result sink is marked degraded.
+
+  phonetic=True also counts words that sound alike ("their"/"there", "right"/"write") as
+  mistakes and, unless strategies are given, adds PhoneticRealign after the bigram resync.
+
+  Token stores carry their language in their vocabulary; language here only matters for
+  compare() on Word lists.
+  """
+
+  def __init__(self, mistake_threshold: Optional[float] = 0.75, window_size: int = 20, max_search: int = 200,
+               cache: Optional[SimilarityCache] = SIMILARITY_CACHE, strategies: Optional[Sequence] = None,
+               profile: bool = False, work_budget: Optional[int] = DEFAULT_WORK_BUDGET, phonetic: bool = False,
+               language: str = DEFAULT_LANGUAGE):
+    self.mistake_threshold = mistake_threshold
+    self.window_size = window_size
+    self.max_search = max_search
+    self.cache = cache
+    self.phonetic = phonetic
+    self.language = language
+    if strategies is not None:
+      self.strategies = tuple(strategies)
+    else:
+      self.strategies = (GreedyBigramRealign(), PhoneticRealign()) if phonetic else (GreedyBigramRealign(),)
+    self._fuzzy = FuzzyMatcher(mistake_threshold) if mistake_threshold is not None else None
+    self._bigram_index: Optional[BigramIndex] = None
+    self._phonetic_index: Optional[PhoneticIndex] = None
+    self.profiling = profile
+    self.profile: Optional[CompareProfile] = None
+    self._profile_start = 0.0
+    self.work_budget = work_budget
+    self.work = 0
+    self.degraded = False
+
+  def compare(self, user_words: List[Word], actual_words: List[Word]) -> List[Dict[str, str]]:
+    vocab = Vocabulary(self.language)
+    return self.compare_tokens(TokenStore.from_words(user_words, vocab), TokenStore.from_words(actual_words, vocab))
+
+  def compare_tokens(self, user: TokenStore, actual: TokenStore, index: Optional[BigramIndex] = None,
+                     result: Optional[ResultSink] = None):
+    """Align user against actual; returns result.build(), by default the list of entry dicts."""
+    self.begin_compare()
+    self._bigram_index = None
+    result = result if result is not None else EntryList()
+    state = AlignmentState()
+    self.align(user, actual, state, result, index=index)
+    self.flush(user, actual, state, result)
+    return self.end_compare(result.build())
+
+  def begin_compare(self):
+    self.work = 0
+    self.degraded = False
+    self.profile = CompareProfile() if self.profiling else None
+    if self.profile is not None:
+      self._profile_start = perf_counter()
+
+  def end_compare(self, built):
+    if self.profile is not None:
+      self.profile.record('total', perf_counter() - self._profile_start)
+    return built
+
+  def spend(self, work: int, result: ResultSink) -> bool:
+    """Charge work to this compare's budget; False once the budget is spent and the compare has degraded."""
+    if self.degraded:
+      return False
+    self.work += work
+    if self.work_budget is not None and self.work > self.work_budget:
+      self.degraded = True
+      result.mark_degraded()
+      if self.profile is not None:
+        self.profile.count('degraded_at_work', self.work)
+      return False
+    return True
+
+  def bigram_index(self, actual: TokenStore) -> BigramIndex:
+    """The bigram index of actual, built on first use unless one was handed in."""
+    if self._bigram_index is None or self._bigram_index.actual is not actual:
+      self._bigram_index = BigramIndex(actual)
+    return self._bigram_index
+
+  def phonetic_index(self, actual: TokenStore) -> PhoneticIndex:
+    if self._phonetic_index is None or self._phonetic_index.actual is not actual:
+      self._phonetic_index = PhoneticIndex(actual)
+    return self._phonetic_index
+
+  def align(self, user: TokenStore, actual: TokenStore, state: 'AlignmentState', result: ResultSink,
+            lookahead: Optional[int] = None, index: Optional[BigramIndex] = None):
+    """
+    Advance state through user and actual, appending entries to result. index is actual's
+    bigram index if the caller has one; otherwise it is built on the first resync.
+
+    With lookahead set, stop before a resync that would see fewer than lookahead
+    upcoming user words, so the caller can resume once more words are typed.
+    """
+    if index is not None:
+      self._bigram_index = index
+    masks = user.vocab.masks
+    user_ids, actual_ids = user.ids, actual.ids
+    user_surfaces, actual_surfaces = user.surface_ids, actual.surface_ids
+    user_idx, actual_idx, matched_once = state.user_idx, state.actual_idx, state.matched_once
+    profile = self.profile
+    steps = 0
+
+    while user_idx < len(user_ids) and actual_idx < len(actual_ids):
+      steps += 1
+      user_id, actual_id = user_ids[user_idx], actual_ids[actual_idx]
+      if (user_id == actual_id or masks[user_id] & masks[actual_id]
+          or user_surfaces[user_idx] == actual_surfaces[actual_idx]):
+        if not matched_once and actual_idx > 0:
+          for idx in range(actual_idx):
+            result.add('missing', actual, idx, idx)
+        matched_once = True
+        result.add('correct', user, user_idx, actual_idx)
+        user_idx += 1
+        actual_idx += 1
+        continue
+
+      if self.is_mistake_at(user, user_idx, actual, actual_idx):
+        if not matched_once and actual_idx > 0:
+          for idx in range(actual_idx):
+            result.add('missing', actual, idx, idx)
+        matched_once = True
+        result.add('mistake', user, user_idx, actual_idx)
+        user_idx += 1
+        actual_idx += 1
+        continue
+
+      if lookahead is not None and len(user_ids) - user_idx < lookahead:
+        break
+
+      last_result_len = len(result)
+      if profile is not None:
+        start = perf_counter()
+        user_idx, actual_idx = self.realign(user, user_idx, actual, actual_idx, result, matched_once)
+        profile.record('realign', perf_counter() - start)
+      else:
+        user_idx, actual_idx = self.realign(user, user_idx, actual, actual_idx, result, matched_once)
+
+      if len(result) == last_result_len:
+        result.add('wrong', user, user_idx, actual_idx)
+        result.add('missing', actual, actual_idx, actual_idx)
+        user_idx += 1
+        actual_idx += 1
+
+    state.user_idx, state.actual_idx, state.matched_once = user_idx, actual_idx, matched_once
+    if profile is not None:
+      profile.count('pairs_compared', steps)
+
+  def flush(self, user: TokenStore, actual: TokenStore, state: 'AlignmentState', result: ResultSink):
+    """Mark everything left over once the user input is complete: extra user words and untyped transcript."""
+    while state.user_idx < len(user):
+      result.add('wrong', user, state.user_idx, state.actual_idx)
+      state.user_idx += 1
+
+    while state.actual_idx < len(actual):
+      result.add('missing', actual, state.actual_idx, state.actual_idx)
+      state.actual_idx += 1
+
+  def search_stop(self, user_idx: int, actual: TokenStore, actual_start_idx: int) -> int:
+    """End (exclusive) of the transcript positions a resync from actual_start_idx may jump to."""
+    # The search covers whole windows, so the last one may run past max_search.
+    remaining = len(actual) - actual_start_idx
+    search_span = -(-min(remaining, self.max_search) // self.window_size) * self.window_size
+    return actual_start_idx + min(search_span, remaining - 1)
+
+  def realign(self, user: TokenStore, user_start_idx: int, actual: TokenStore, actual_start_idx: int,
+              result: ResultSink, matched_once: bool):
+    """Try each strategy in order; the first one that appends entries decides the new position."""
+    for strategy in DEGRADED_STRATEGIES if self.degraded else self.strategies:
+      last_result_len = len(result)
+      user_idx, actual_idx = strategy.realign(self, user, user_start_idx, actual, actual_start_idx,
+                                              result, matched_once)
+      if len(result) > last_result_len:
+        if self.profile is not None:
+          self.profile.count(f'realign_hits.{type(strategy).__name__}')
+        return user_idx, actual_idx
+    return user_start_idx, actual_start_idx
+
+  def fill_field_gaps(self, user_gap: TokenSpan, actual_gap: TokenSpan, result: ResultSink):
+    if not self.spend(len(user_gap) * len(actual_gap), result):
+      self.skip_gap(user_gap, actual_gap, result)
+      return
+    profile = self.profile
+    if profile is not None:
+      profile.gap(len(user_gap), len(actual_gap))
+      start = perf_counter()
+    if len(user_gap) * len(actual_gap) < GAP_MATRIX_MIN_PAIRS or not resolve_gap(self, user_gap, actual_gap, result):
+      self._fill_gap_pairwise(user_gap, actual_gap, result)
+    if profile is not None:
+      profile.record('fill_field_gaps', perf_counter() - start)
+
+  def _fill_gap_pairwise(self, user_gap: TokenSpan, actual_gap: TokenSpan, result: ResultSink):
+    user_used = [False] * len(user_gap)
+
+    for a in range(len(actual_gap)):
+      matched = False
+      for i in range(len(user_gap)):
+        if not user_used[i] and self.equivalent_at(user_gap.store, user_gap.start + i,
+                                                   actual_gap.store, actual_gap.start + a):
+          result.add('correct', user_gap.store, user_gap.start + i, actual_gap.start + a)
+          user_used[i] = True
+          matched = True
+          break
+      if not matched:
+        for i in range(len(user_gap)):
+          if not user_used[i] and self.is_mistake_at(user_gap.store, user_gap.start + i,
+                                                     actual_gap.store, actual_gap.start + a):
+            result.add('mistake', user_gap.store, user_gap.start + i, actual_gap.start + a)
+            user_used[i] = True
+            matched = True
+            break
+      if not matched:
+        result.add('missing', actual_gap.store, actual_gap.start + a, actual_gap.start + a)
+
+    for i, used in enumerate(user_used):
+      if not used:
+        result.add('wrong', user_gap.store, user_gap.start + i, actual_gap.stop)
+
+  def skip_gap(self, user_gap: TokenSpan, actual_gap: TokenSpan, result: ResultSink):
+    """Mark a gap without pairing its words: the transcript words missing, the user words wrong."""
+    for a in range(len(actual_gap)):
+      result.add('missing', actual_gap.store, actual_gap.start + a, actual_gap.start + a)
+    for u in range(len(user_gap)):
+      result.add('wrong', user_gap.store, user_gap.start + u, actual_gap.stop)
+
+  def is_mistake(self, user_norm: str, actual_norm: str) -> bool:
+    if self.phonetic and sounds_alike(user_norm, actual_norm):
+      return True
+    if self._fuzzy is None:
+      return False
+    if self.cache is None:
+      return self._fuzzy_matches(user_norm, actual_norm)
+    key = (user_norm, actual_norm, self.mistake_threshold)
+    mistake = self.cache.get(key)
+    if mistake is None:
+      mistake = self._fuzzy_matches(user_norm, actual_norm)
+      self.cache.put(key, mistake)
+    return mistake
+
+  def equivalent_at(self, user: TokenStore, user_idx: int, actual: TokenStore, actual_idx: int) -> bool:
+    """The two tokens have equal or equivalent IDs, or the same surface spelling ("dont" for "don't")."""
+    masks = user.vocab.masks
+    user_id, actual_id = user.ids[user_idx], actual.ids[actual_idx]
+    return (user_id == actual_id or bool(masks[user_id] & masks[actual_id])
+            or user.surface_ids[user_idx] == actual.surface_ids[actual_idx])
+
+  def is_mistake_at(self, user: TokenStore, user_idx: int, actual: TokenStore, actual_idx: int) -> bool:
+    """is_mistake on the two tokens, then on their surface spellings if either was collapsed ("fourty" for "40")."""
+    strings = user.vocab.strings
+    user_id, actual_id = user.ids[user_idx], actual.ids[actual_idx]
+    if self.is_mistake(strings[user_id], strings[actual_id]):
+      return True
+    user_surface, actual_surface = user.surface_ids[user_idx], actual.surface_ids[actual_idx]
+    return ((user_surface != user_id or actual_surface != actual_id)
+            and self.is_mistake(strings[user_surface], strings[actual_surface]))
+
+  def _fuzzy_matches(self, user_norm: str, actual_norm: str) -> bool:
+    if self.profile is None:
+      return self._fuzzy.matches(user_norm, actual_norm)
+    start = perf_counter()
+    mistake = self._fuzzy.matches(user_norm, actual_norm)
+    self.profile.record('fuzzy', perf_counter() - start)
+    return mistake
+
+
+class DiffComparer(TranscriptionComparerV4Pro):
+  """
+  Word-level Myers O((N+M)·D) diff with the linear-space middle-snake split.
+
+  Words are aligned on equivalence; the unmatched stretches between two aligned words are
+  resolved with fill_field_gaps, so the entries have the same correct/mistake/missing/wrong
+  meaning as the greedy engine. Gaps larger than max_gap_pairs candidate pairs (e.g. a
+  pasted paragraph that has nothing to do with the video) skip the fuzzy pairing. Once
+  the work budget is spent, the ranges still to be split are aligned position by position.
+  """
+
+  def __init__(self, mistake_threshold: Optional[float] = 0.75, max_gap_pairs: int = 2500,
+               cache: Optional[SimilarityCache] = SIMILARITY_CACHE, profile: bool = False,
+               work_budget: Optional[int] = DEFAULT_WORK_BUDGET, phonetic: bool = False,
+               language: str = DEFAULT_LANGUAGE):
+    super().__init__(mistake_threshold=mistake_threshold, cache=cache, profile=profile, work_budget=work_budget,
+                     phonetic=phonetic, language=language)
+    self.max_gap_pairs = max_gap_pairs
+
+  def compare_tokens(self, user: TokenStore, actual: TokenStore, index: Optional[BigramIndex] = None,
+                     result: Optional[ResultSink] = None):
+    self._user_ids = user.ids
+    self._actual_ids = actual.ids
+    self._user_surfaces = user.surface_ids
+    self._actual_surfaces = actual.surface_ids
+    self._masks = user.vocab.masks
+    self.begin_compare()
+    result = result if result is not None else EntryList()
+    self._result = result
+
+    matches = []
+    self._diff(0, len(user), 0, len(actual), matches)
+    if self.profile is not None:
+      self.profile.record('diff', perf_counter() - self._profile_start)
+
+    user_idx = 0
+    actual_idx = 0
+    for u, a in matches + [(len(user), len(actual))]:
+      if u > user_idx or a > actual_idx:
+        self._fill_gap(user.span(user_idx, u), actual.span(actual_idx, a), result)
+      if u < len(user):
+        result.add('correct', user, u, a)
+      user_idx, actual_idx = u + 1, a + 1
+    return self.end_compare(result.build())
+
+  def _fill_gap(self, user_gap: TokenSpan, actual_gap: TokenSpan, result: ResultSink):
+    if len(user_gap) * len(actual_gap) <= self.max_gap_pairs:
+      self.fill_field_gaps(user_gap, actual_gap, result)
+      return
+    if self.profile is not None:
+      self.profile.count('gaps_over_limit')
+    self.skip_gap(user_gap, actual_gap, result)
+
+  def _equivalent_at(self, u: int, a: int) -> bool:
+    user_id, actual_id = self._user_ids[u], self._actual_ids[a]
+    return (user_id == actual_id or bool(self._masks[user_id] & self._masks[actual_id])
+            or self._user_surfaces[u] == self._actual_surfaces[a])
+
+  def _diff(self, u_lo: int, u_hi: int, a_lo: int, a_hi: int, matches: List[tuple]):
+    """Append the aligned (user_idx, actual_idx) pairs of the two ranges to matches, in order."""
+    eq = self._equivalent_at
+    while u_lo < u_hi and a_lo < a_hi and eq(u_lo, a_lo):
+      matches.append((u_lo, a_lo))
+      u_lo += 1
+      a_lo += 1
+    suffix = []
+    while u_lo < u_hi and a_lo < a_hi and eq(u_hi - 1, a_hi - 1):
+      u_hi -= 1
+      a_hi -= 1
+      suffix.append((u_hi, a_hi))
+
+    if u_lo < u_hi and a_lo < a_hi:
+      snake = self._middle_snake(u_lo, u_hi, a_lo, a_hi)
+      if snake is None:
+        self._step_matches(u_lo, u_hi, a_lo, a_hi, matches)
+        matches.extend(reversed(suffix))
+        return
+      x_start, y_start, x_end, y_end = snake
+      self._diff(u_lo, u_lo + x_start, a_lo, a_lo + y_start, matches)
+      for offset in range(x_end - x_start):
+        matches.append((u_lo + x_start + offset, a_lo + y_start + offset))
+      self._diff(u_lo + x_end, u_hi, a_lo + y_end, a_hi, matches)
+
+    matches.extend(reversed(suffix))
+
+  def _step_matches(self, u_lo: int, u_hi: int, a_lo: int, a_hi: int, matches: List[tuple]):
+    """The over-budget fallback: pair the two ranges position by position and keep the equivalent pairs."""
+    eq = self._equivalent_at
+    for offset in range(min(u_hi - u_lo, a_hi - a_lo)):
+      if eq(u_lo + offset, a_lo + offset):
+        matches.append((u_lo + offset, a_lo + offset))
+
+  def _middle_snake(self, u_lo: int, u_hi: int, a_lo: int, a_hi: int):
+    """
+    Myers' middle snake of the two ranges, as (x_start, y_start, x_end, y_end) relative
+    offsets, or None once the work budget is spent.
+    """
+    user_ids, actual_ids = self._user_ids, self._actual_ids
+    user_surfaces, actual_surfaces = self._user_surfaces, self._actual_surfaces
+    masks = self._masks
+    n = u_hi - u_lo
+    m = a_hi - a_lo
+    delta = n - m
+    odd = delta % 2 != 0
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    if self.profile is not None:
+      self.profile.count('middle_snakes')
+    for d in range(max_d + 1):
+      if not self.spend(2 * d + 2, self._result):
+        return None
+      for k in range(-d, d + 1, 2):
+        if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+          x = forward[offset + k + 1]
+        else:
+          x = forward[offset + k - 1] + 1
+        y = x - k
+        x_start, y_start = x, y
+        while x < n and y < m:
+          u, a = u_lo + x, a_lo + y
+          if (user_ids[u] != actual_ids[a] and not masks[user_ids[u]] & masks[actual_ids[a]]
+              and user_surfaces[u] != actual_surfaces[a]):
+            break
+          x += 1
+          y += 1
+        forward[offset + k] = x
+        if odd and -(d - 1) <= delta - k <= d - 1 and x + backward[offset + delta - k] >= n:
+          return x_start, y_start, x, y
+
+      for k in range(-d, d + 1, 2):
+        if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+          x = backward[offset + k + 1]
+        else:
+          x = backward[offset + k - 1] + 1
+        y = x - k
+        x_start, y_start = x, y
+        while x < n and y < m:
+          u, a = u_hi - 1 - x, a_hi - 1 - y
+          if (user_ids[u] != actual_ids[a] and not masks[user_ids[u]] & masks[actual_ids[a]]
+              and user_surfaces[u] != actual_surfaces[a]):
+            break
+          x += 1
+          y += 1
+        backward[offset + k] = x
+        if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+          return n - x, m - y, n - x_start, m - y_start
+
+    return 0, 0, 0, 0
+
+
+class TimedComparer(TranscriptionComparerV4Pro):
+  """
+  Greedy alignment that uses the transcript's per-word timestamps.
+
+  The student is expected to progress through the transcript at an even pace, so user
+  word i should sit near t0 + (t1 - t0) * i / len(user). A resync may only jump up to
+  band_seconds past that time (or past the current position, if the student is ahead),
+  so a far-away repeat of the same phrase cannot pull the alignment forward. Compare a
+  clip with actual.time_slice() to make the cost scale with the practised range.
+  """
+
+  def __init__(self, mistake_threshold: Optional[float] = 0.75, band_seconds: float = 8.0,
+               cache: Optional[SimilarityCache] = SIMILARITY_CACHE, **kwargs):
+    super().__init__(mistake_threshold=mistake_threshold, cache=cache, **kwargs)
+    self.band_seconds = band_seconds
+    self._seconds_per_word = 0.0
+
+  def compare_tokens(self, user: TokenStore, actual: TokenStore, index: Optional[BigramIndex] = None,
+                     result: Optional[ResultSink] = None):
+    self._seconds_per_word = 0.0
+    if len(actual) > 1 and len(user):
+      self._seconds_per_word = (actual.timestamps[-1] - actual.timestamps[0]) / len(user)
+    return super().compare_tokens(user, actual, index=index, result=result)
+
+  def search_stop(self, user_idx: int, actual: TokenStore, actual_start_idx: int) -> int:
+    stop = super().search_stop(user_idx, actual, actual_start_idx)
+    timestamps = actual.timestamps
+    expected = timestamps[0] + self._seconds_per_word * user_idx
+    band_end = bisect_right(timestamps, max(expected, timestamps[actual_start_idx]) + self.band_seconds)
+    return min(stop, max(band_end, actual_start_idx + 1))
+
+
+COMPARE_MODES = {
+  'greedy': TranscriptionComparerV4Pro,
+  'diff': DiffComparer,
+  'timed': TimedComparer,
+}
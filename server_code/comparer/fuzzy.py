@@ -0,0 +1,107 @@
+import math
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict
+
+
+@lru_cache(maxsize=65536)
+def char_histogram(word: str) -> Dict[str, int]:
+  histogram = {}
+  for ch in word:
+    histogram[ch] = histogram.get(ch, 0) + 1
+  return histogram
+
+
+def banded_indel_distance(a: str, b: str, max_distance: int) -> int:
+  """
+  Insert/delete edit distance between a and b, only evaluated inside a diagonal band of
+  width max_distance. Returns max_distance + 1 as soon as the distance is known to exceed it.
+  """
+  la, lb = len(a), len(b)
+  if abs(la - lb) > max_distance:
+    return max_distance + 1
+  over = max_distance + 1
+  previous = [j if j <= max_distance else over for j in range(lb + 1)]
+  for i in range(1, la + 1):
+    lo = max(1, i - max_distance)
+    hi = min(lb, i + max_distance)
+    current = [over] * (lb + 1)
+    if i <= max_distance:
+      current[0] = i
+    ch = a[i - 1]
+    row_min = current[0]
+    for j in range(lo, hi + 1):
+      if ch == b[j - 1]:
+        cost = previous[j - 1]
+      else:
+        cost = min(previous[j], current[j - 1]) + 1
+      if cost > over:
+        cost = over
+      current[j] = cost
+      if cost < row_min:
+        row_min = cost
+    if row_min > max_distance:
+      return over
+    previous = current
+  return min(previous[lb], over)
+
+
+class FuzzyMatcher:
+  """
+  Decides whether two normalized words are close enough to count as a "mistake", i.e.
+  SequenceMatcher(None, a, b).ratio() >= threshold, without building a SequenceMatcher
+  for pairs that cannot reach the threshold.
+
+  Each stage is an upper bound on the number of matching characters M that the ratio
+  2*M/(len(a)+len(b)) is built from, cheapest first:
+
+  - the shorter word's length;
+  - the shared character (1-gram) counts;
+  - the longest common subsequence, from a banded insert/delete distance that stops as
+    soon as the threshold is out of reach.
+
+  Only pairs that pass all three are verified with SequenceMatcher, so the decision is
+  exactly the one is_mistake has always made.
+  """
+
+  def __init__(self, threshold: float = 0.75):
+    self.threshold = threshold
+    self._max_indel: Dict[int, int] = {}
+
+  def _reaches(self, matching: int, total: int) -> bool:
+    # Same arithmetic as SequenceMatcher.ratio(), so bounds compare exactly like the ratio.
+    return 2.0 * matching / total >= self.threshold
+
+  def _max_indel_distance(self, total: int) -> int:
+    # Largest indel distance whose LCS, (total - distance) / 2, still reaches the threshold.
+    lcs_needed = max(0, math.ceil(self.threshold * total / 2) - 1)
+    while not self._reaches(lcs_needed, total):
+      lcs_needed += 1
+    return total - 2 * lcs_needed
+
+  def matches(self, a: str, b: str) -> bool:
+    if a == b:
+      return self.threshold <= 1.0
+    total = len(a) + len(b)
+    if not self._reaches(min(len(a), len(b)), total):
+      return False
+
+    hist_a = char_histogram(a)
+    hist_b = char_histogram(b)
+    if len(hist_a) > len(hist_b):
+      hist_a, hist_b = hist_b, hist_a
+    shared = 0
+    for ch, count in hist_a.items():
+      other = hist_b.get(ch)
+      if other:
+        shared += count if count < other else other
+    if not self._reaches(shared, total):
+      return False
+
+    max_indel = self._max_indel.get(total)
+    if max_indel is None:
+      max_indel = self._max_indel[total] = self._max_indel_distance(total)
+    if banded_indel_distance(a, b, max_indel) > max_indel:
+      return False
+
+    return SequenceMatcher(None, a, b).ratio() >= self.threshold
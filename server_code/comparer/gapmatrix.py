@@ -0,0 +1,127 @@
+from typing import List
+from .fuzzy import FuzzyMatcher, char_histogram
+from .phonetic import sound_key
+from .results import ResultSink
+from .tokens import TokenSpan
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+# Below this many user x transcript pairs the pairwise loop beats setting up the matrices.
+GAP_MATRIX_MIN_PAIRS = 256
+
+# Cap on the (rows x columns x alphabet) temporary of the histogram bound.
+_HISTOGRAM_BLOCK_CELLS = 1 << 20
+
+
+def fuzzy_candidates(fuzzy: FuzzyMatcher, user_words: List[str], actual_words: List[str]):
+  """
+  Boolean matrix of the (user, actual) word pairs whose shared character counts can still
+  reach fuzzy.threshold: the histogram bound of FuzzyMatcher.matches for the whole gap at
+  once, with the same arithmetic, so no pair that matches() would accept is dropped.
+  """
+  alphabet = {}
+  for word in user_words + actual_words:
+    for ch in word:
+      alphabet.setdefault(ch, len(alphabet))
+
+  def histograms(words):
+    counts = np.zeros((len(words), len(alphabet)), dtype=np.int32)
+    for row, word in enumerate(words):
+      for ch, count in char_histogram(word).items():
+        counts[row, alphabet[ch]] = count
+    return counts
+
+  user_counts, actual_counts = histograms(user_words), histograms(actual_words)
+  user_lengths = np.array([len(w) for w in user_words], dtype=np.float64)
+  actual_lengths = np.array([len(w) for w in actual_words], dtype=np.float64)
+
+  shared = np.empty((len(user_words), len(actual_words)), dtype=np.float64)
+  block = max(1, _HISTOGRAM_BLOCK_CELLS // max(1, len(actual_words) * len(alphabet)))
+  for lo in range(0, len(user_words), block):
+    shared[lo:lo + block] = np.minimum(user_counts[lo:lo + block, None, :], actual_counts[None, :, :]).sum(axis=2)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    return 2.0 * shared / (user_lengths[:, None] + actual_lengths[None, :]) >= fuzzy.threshold
+
+
+def phonetic_pairs(user_words: List[str], actual_words: List[str]):
+  """Boolean matrix of the (user, actual) word pairs with the same, non-empty sound key."""
+  key_ids = {}
+
+  def key_array(words, unkeyed):
+    ids = []
+    for word in words:
+      key = sound_key(word)
+      ids.append(key_ids.setdefault(key, len(key_ids)) if key else unkeyed)
+    return np.array(ids)
+
+  # Words without a key get distinct negative ids on the two sides, so they never pair.
+  return key_array(user_words, -1)[:, None] == key_array(actual_words, -2)[None, :]
+
+
+def resolve_gap(engine, user_gap: TokenSpan, actual_gap: TokenSpan, result: ResultSink) -> bool:
+  """
+  fill_field_gaps for a whole gap in a few array operations: the equivalence matrix (IDs,
+  masks and surfaces, as engine.equivalent_at) and the fuzzy and phonetic candidates, of
+  the normalized words and of their surface spellings, come in one batch, and only the
+  candidates are verified with engine.is_mistake_at.
+  Matches are then assigned exactly as the pairwise loop does: each transcript word, in
+  order, takes the first unused equivalent user word, else the first unused verified
+  mistake. Returns False, having added nothing, when NumPy is missing or the equivalence
+  masks do not fit in 64 bits.
+  """
+  if np is None:
+    return False
+  vocab = user_gap.store.vocab
+  masks, strings = vocab.masks, vocab.strings
+  user_ids, actual_ids = list(user_gap.ids), list(actual_gap.ids)
+  user_masks = [masks[i] for i in user_ids]
+  actual_masks = [masks[i] for i in actual_ids]
+  if max(user_masks + actual_masks, default=0) >= 1 << 63:
+    return False
+
+  user_id_array, actual_id_array = np.array(user_ids), np.array(actual_ids)
+  equivalent = ((user_id_array[:, None] == actual_id_array[None, :])
+                | ((np.array(user_masks, dtype=np.int64)[:, None] & np.array(actual_masks, dtype=np.int64)[None, :]) != 0))
+  user_words = [strings[i] for i in user_ids]
+  actual_words = [strings[i] for i in actual_ids]
+  candidates = fuzzy_candidates(engine._fuzzy, user_words, actual_words) if engine._fuzzy is not None else None
+  user_surface_ids = list(user_gap.store.surface_ids[user_gap.start:user_gap.stop])
+  actual_surface_ids = list(actual_gap.store.surface_ids[actual_gap.start:actual_gap.stop])
+  user_surfaces = [strings[i] for i in user_surface_ids]
+  actual_surfaces = [strings[i] for i in actual_surface_ids]
+  collapsed = user_surface_ids != user_ids or actual_surface_ids != actual_ids
+  if collapsed:
+    equivalent |= np.array(user_surface_ids)[:, None] == np.array(actual_surface_ids)[None, :]
+  if candidates is not None and collapsed:
+    candidates |= fuzzy_candidates(engine._fuzzy, user_surfaces, actual_surfaces)
+  if engine.phonetic:
+    sound = phonetic_pairs(user_words, actual_words)
+    if collapsed:
+      sound |= phonetic_pairs(user_surfaces, actual_surfaces)
+    candidates = sound if candidates is None else candidates | sound
+
+  unused = np.ones(len(user_ids), dtype=bool)
+  for a in range(len(actual_ids)):
+    hits = np.flatnonzero(equivalent[:, a] & unused)
+    if hits.size:
+      i = int(hits[0])
+      result.add('correct', user_gap.store, user_gap.start + i, actual_gap.start + a)
+      unused[i] = False
+      continue
+    matched = False
+    if candidates is not None:
+      for i in np.flatnonzero(candidates[:, a] & unused).tolist():
+        if engine.is_mistake_at(user_gap.store, user_gap.start + i, actual_gap.store, actual_gap.start + a):
+          result.add('mistake', user_gap.store, user_gap.start + i, actual_gap.start + a)
+          unused[i] = False
+          matched = True
+          break
+    if not matched:
+      result.add('missing', actual_gap.store, actual_gap.start + a, actual_gap.start + a)
+
+  for i in np.flatnonzero(unused).tolist():
+    result.add('wrong', user_gap.store, user_gap.start + i, actual_gap.stop)
+  return True
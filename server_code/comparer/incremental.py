@@ -0,0 +1,83 @@
+from typing import Dict, Optional
+from .engine import AlignmentState, TranscriptionComparerV4Pro
+from .languages import DEFAULT_LANGUAGE
+from .preprocess import append_tokens, find_prepared_transcript, prepare_transcript, scan_words
+from .results import EntryList
+from .tokens import TokenStore
+
+
+class IncrementalComparer:
+  """
+  Greedy comparison that resumes from a checkpoint as the student keeps typing.
+
+  A checkpoint is a plain dict, so it can round-trip through the client. It holds the
+  alignment state and the tail of the input that is not decided yet: the last word, which
+  may still be half typed, and any words held back until lookahead words are available
+  for a resync. Returned entries are never revisited, so a call costs O(new words).
+  Because resyncs only see lookahead words ahead, live entries can differ slightly from a
+  full compare; the final call flushes whatever is left.
+
+  start() prepares and stores the transcript; feed() finds it again by the content hash
+  in the checkpoint, so the transcript is sent and hashed once per session. Each feed gets
+  the comparer's full work budget; the checkpoint's 'degraded' flag stays set once any feed
+  of the session ran out of it.
+  """
+
+  def __init__(self, comparer: Optional[TranscriptionComparerV4Pro] = None, lookahead: int = 8):
+    self.comparer = comparer or TranscriptionComparerV4Pro()
+    self.lookahead = lookahead
+
+  def start(self, actual_transcript: str, language: str = DEFAULT_LANGUAGE) -> Dict:
+    prepared = prepare_transcript(actual_transcript, persist=True, language=language)
+    return {
+      'transcript': prepared.content_hash,
+      'language': language,
+      'actual_idx': 0,
+      'matched_once': False,
+      'tail': '',
+      'emitted': 0,
+      'degraded': False
+    }
+
+  def feed(self, checkpoint: Dict, new_text: str, final: bool = False):
+    language = checkpoint.get('language', DEFAULT_LANGUAGE)
+    prepared = find_prepared_transcript(checkpoint['transcript'])
+    if prepared is None:
+      raise ValueError("The checkpoint's transcript is no longer available; start the comparison again")
+    actual = prepared.actual
+    text = checkpoint['tail'] + new_text
+    matches = scan_words(text)
+    if not final and matches and matches[-1].end() == len(text):
+      matches.pop()
+
+    # A trailing "do" may still become "do not" and "twenty" "twenty-one"; those words wait for the next call.
+    user = TokenStore(actual.vocab.overlay())
+    starts = append_tokens(user, matches, hold_open=not final)
+    del matches[starts[-1]:]
+
+    state = AlignmentState(0, checkpoint['actual_idx'], checkpoint['matched_once'])
+    result = EntryList()
+    self.comparer.begin_compare()
+    self.comparer.align(user, actual, state, result, lookahead=None if final else self.lookahead, index=prepared.index)
+    if final or state.actual_idx >= len(actual):
+      self.comparer.flush(user, actual, state, result)
+    entries = result.build()
+
+    if final:
+      tail = ''
+    elif state.user_idx < len(user):
+      tail = text[matches[starts[state.user_idx]].start():]
+    elif matches:
+      tail = text[matches[-1].end():]
+    else:
+      tail = text
+
+    return entries, {
+      'transcript': checkpoint['transcript'],
+      'language': language,
+      'actual_idx': state.actual_idx,
+      'matched_once': state.matched_once,
+      'tail': tail,
+      'emitted': checkpoint['emitted'] + len(entries),
+      'degraded': checkpoint.get('degraded', False) or result.degraded
+    }
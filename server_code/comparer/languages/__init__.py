@@ -0,0 +1,80 @@
+"""
+Per-language normalization data: accent folding, contraction and abbreviation groups,
+and number words. A pack module is imported the first time its language is compared
+and its tables stay cached for the life of the server worker, so a worker only pays for
+the languages it actually grades.
+"""
+import importlib
+import unicodedata
+from typing import Dict
+from ..contractions import ContractionTrie, contraction_key
+from ..numbers import NumberNormalizer
+
+SUPPORTED_LANGUAGES = ('en', 'es', 'fr', 'de', 'pt')
+DEFAULT_LANGUAGE = 'en'
+
+# Latin-1 Supplement and Latin Extended-A/B: every accented letter a transcript is likely to use.
+_FOLDED_RANGE = range(0xC0, 0x250)
+
+
+def _fold_map(fold: Dict[str, str], keep: str) -> Dict[str, str]:
+  """Lowercase letter -> its unaccented form, with the pack's own replacements taking precedence."""
+  mapping = {}
+  for code in _FOLDED_RANGE:
+    ch = chr(code)
+    if ch != ch.lower() or ch in keep:
+      continue
+    base = ''.join(c for c in unicodedata.normalize('NFD', ch) if not unicodedata.combining(c))
+    if base != ch and base.isascii():
+      mapping[ch] = base
+  mapping.update(fold)
+  return mapping
+
+
+class LanguagePack:
+  """
+  The compiled tables of one language. Tokens are lowercased and then put through one
+  str.translate per key: normalize_table for the interned form, contraction_table for the
+  contraction trie (apostrophes kept) and fold_table for the number reader (digit
+  separators kept). Every table folds accents the same way.
+  """
+  __slots__ = ('code', 'fold_table', 'contraction_table', 'normalize_table', 'contractions', 'numbers',
+               'equivalence_index')
+
+  def __init__(self, code: str, module):
+    self.code = code
+    fold = _fold_map(getattr(module, 'FOLD', {}), getattr(module, 'KEEP', ''))
+    self.fold_table = str.maketrans(fold)
+    self.contraction_table = str.maketrans({**fold, '’': "'", '.': None, ',': None})
+    self.normalize_table = str.maketrans({**fold, "'": None, '’': None, '.': None, ',': None})
+
+    groups = module.EQUIVALENTS
+    self.contractions = ContractionTrie(groups, key=lambda text: contraction_key(text).translate(self.fold_table))
+    self.numbers = NumberNormalizer({word.translate(self.fold_table): entry for word, entry in module.NUMBER_LEXICON.items()},
+                                    extra_transitions=getattr(module, 'NUMBER_TRANSITIONS', None),
+                                    years=getattr(module, 'READ_YEARS', False),
+                                    decimal_comma=getattr(module, 'DECIMAL_COMMA', False))
+
+    # One bit per group; a token can belong to several ("'s" is is/has/us), hence a mask.
+    # Contractions typed without their apostrophe ("dont") are not in any group: they match
+    # only the contraction's own spelling, through TokenStore.surface_ids.
+    self.equivalence_index: Dict[str, int] = {}
+    for class_id, forms in enumerate(groups.values()):
+      for form in forms:
+        key = form.lower().translate(self.fold_table)
+        self.equivalence_index[key] = self.equivalence_index.get(key, 0) | (1 << class_id)
+
+  def equivalence_mask(self, normalized: str) -> int:
+    return self.equivalence_index.get(normalized.lower(), 0)
+
+
+_PACKS: Dict[str, LanguagePack] = {}
+
+
+def language_pack(code: str = DEFAULT_LANGUAGE) -> LanguagePack:
+  pack = _PACKS.get(code)
+  if pack is None:
+    if code not in SUPPORTED_LANGUAGES:
+      raise ValueError(f"Unsupported language: {code}")
+    pack = _PACKS[code] = LanguagePack(code, importlib.import_module(f"{__name__}.{code}"))
+  return pack
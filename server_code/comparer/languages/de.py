@@ -0,0 +1,41 @@
+from ..numbers import build_lexicon
+
+FOLD = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'}
+DECIMAL_COMMA = True
+
+EQUIVALENTS = {
+  "geht es": ["geht's", "geht es"],
+  "gibt es": ["gibt's", "gibt es"],
+  "zu dem": ["zum", "zu dem"],
+  "zu der": ["zur", "zu der"],
+  "in dem": ["im", "in dem"],
+  "von dem": ["vom", "von dem"],
+  "zum beispiel": ["zum beispiel", "z b"],
+  "und so weiter": ["und so weiter", "usw"],
+}
+
+UNITS = {"null": 0, "eins": 1, "zwei": 2, "drei": 3, "vier": 4, "fünf": 5, "sechs": 6, "sieben": 7, "acht": 8,
+         "neun": 9}
+TEENS = {"zehn": 10, "elf": 11, "zwölf": 12, "dreizehn": 13, "vierzehn": 14, "fünfzehn": 15, "sechzehn": 16,
+         "siebzehn": 17, "achtzehn": 18, "neunzehn": 19}
+TENS = {"zwanzig": 20, "dreißig": 30, "vierzig": 40, "fünfzig": 50, "sechzig": 60, "siebzig": 70,
+        "achtzig": 80, "neunzig": 90}
+# Prefix of a unit inside a compound: "ein" in "einundzwanzig" and "einhundert".
+_COMPOUND_UNITS = {"ein": 1, **{word: value for word, value in UNITS.items() if value > 1}}
+
+
+def _compile_lexicon():
+  """
+  German writes 21-99 and the hundreds as one word ("einundzwanzig", "zweihundert"), so
+  those compounds are listed whole; longer compounds ("zweitausendvierundzwanzig") are not read.
+  """
+  compounds = {f"{unit}und{tens}": value + tens_value for unit, value in _COMPOUND_UNITS.items()
+               for tens, tens_value in TENS.items()}
+  hundreds = {f"{unit}hundert": value * 100 for unit, value in _COMPOUND_UNITS.items()}
+  return build_lexicon(units=UNITS, teens={**TEENS, **compounds}, tens=TENS,
+                       scales={"tausend": 10 ** 3, "million": 10 ** 6, "millionen": 10 ** 6, "milliarde": 10 ** 9,
+                               "milliarden": 10 ** 9},
+                       hundred=["hundert"], hundreds=hundreds, point_words=["komma"])
+
+
+NUMBER_LEXICON = _compile_lexicon()
@@ -0,0 +1,34 @@
+from transcription_equivalents import ABBREVIATION_EQUIVALENTS
+from ..numbers import build_lexicon
+
+EQUIVALENTS = ABBREVIATION_EQUIVALENTS
+READ_YEARS = True
+
+UNITS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+TEENS = ["ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+TENS = ["twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+SCALES = {"thousand": 10 ** 3, "million": 10 ** 6, "billion": 10 ** 9, "trillion": 10 ** 12}
+IRREGULAR_ORDINALS = {"first": "one", "second": "two", "third": "three", "fifth": "five", "eighth": "eight",
+                      "ninth": "nine", "twelfth": "twelve"}
+
+
+def _compile_lexicon():
+  lexicon = build_lexicon(units={word: value for value, word in enumerate(UNITS)},
+                          teens={word: value for value, word in enumerate(TEENS, start=10)},
+                          tens={word: value * 10 for value, word in enumerate(TENS, start=2)},
+                          scales=SCALES, hundred=["hundred"], and_words=["and"], point_words=["point"],
+                          oh_words=["oh"])
+  for word in UNITS[1:] + TEENS + ["hundred"] + list(SCALES):
+    if word not in IRREGULAR_ORDINALS.values():
+      kind, value, _ = lexicon[word]
+      lexicon[word + "th"] = (kind, value, True)
+  for word in TENS:
+    kind, value, _ = lexicon[word]
+    lexicon[word[:-1] + "ieth"] = (kind, value, True)
+  for ordinal, cardinal in IRREGULAR_ORDINALS.items():
+    kind, value, _ = lexicon[cardinal]
+    lexicon[ordinal] = (kind, value, True)
+  return lexicon
+
+
+NUMBER_LEXICON = _compile_lexicon()
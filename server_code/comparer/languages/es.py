@@ -0,0 +1,30 @@
+from ..numbers import TENS_AND_TRANSITIONS, build_lexicon
+
+# "año" and "ano" are different words; every other accent folds.
+KEEP = 'ñ'
+DECIMAL_COMMA = True
+
+EQUIVALENTS = {
+  "usted": ["usted", "ud", "vd"],
+  "ustedes": ["ustedes", "uds", "vds"],
+  "señor": ["señor", "sr"],
+  "señora": ["señora", "sra"],
+  "por favor": ["por favor", "porfa"],
+  "para": ["para", "pa"],
+}
+
+# "una" is left out: reading it as 1 would make "una" and "un" interchangeable.
+NUMBER_LEXICON = build_lexicon(
+  units={"cero": 0, "un": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6, "siete": 7,
+         "ocho": 8, "nueve": 9},
+  teens={"diez": 10, "once": 11, "doce": 12, "trece": 13, "catorce": 14, "quince": 15, "dieciséis": 16,
+         "diecisiete": 17, "dieciocho": 18, "diecinueve": 19, "veintiún": 21, "veintiuno": 21, "veintidós": 22,
+         "veintitrés": 23, "veinticuatro": 24, "veinticinco": 25, "veintiséis": 26, "veintisiete": 27,
+         "veintiocho": 28, "veintinueve": 29},
+  tens={"veinte": 20, "treinta": 30, "cuarenta": 40, "cincuenta": 50, "sesenta": 60, "setenta": 70,
+        "ochenta": 80, "noventa": 90},
+  scales={"mil": 10 ** 3, "millón": 10 ** 6, "millones": 10 ** 6, "billón": 10 ** 12, "billones": 10 ** 12},
+  hundreds={"cien": 100, "ciento": 100, "doscientos": 200, "trescientos": 300, "cuatrocientos": 400,
+            "quinientos": 500, "seiscientos": 600, "setecientos": 700, "ochocientos": 800, "novecientos": 900},
+  and_words=["y"], point_words=["coma"])
+NUMBER_TRANSITIONS = TENS_AND_TRANSITIONS
@@ -0,0 +1,28 @@
+from ..numbers import TENS_AND_TRANSITIONS, build_lexicon
+
+DECIMAL_COMMA = True
+
+EQUIVALENTS = {
+  "s'il vous plaît": ["s'il vous plaît", "svp"],
+  "s'il te plaît": ["s'il te plaît", "stp"],
+  "madame": ["madame", "mme"],
+  "mademoiselle": ["mademoiselle", "mlle"],
+  "monsieur": ["monsieur", "mr"],
+}
+
+# "une" is left out: reading it as 1 would make "une" and "un" interchangeable. The
+# "quatre-vingt" forms multiply and are not read; "septante", "huitante" and "nonante" are.
+NUMBER_LEXICON = build_lexicon(
+  units={"zéro": 0, "un": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6, "sept": 7, "huit": 8,
+         "neuf": 9},
+  teens={"dix": 10, "onze": 11, "douze": 12, "treize": 13, "quatorze": 14, "quinze": 15, "seize": 16},
+  tens={"vingt": 20, "trente": 30, "quarante": 40, "cinquante": 50, "soixante": 60, "septante": 70,
+        "huitante": 80, "octante": 80, "nonante": 90},
+  scales={"mille": 10 ** 3, "million": 10 ** 6, "millions": 10 ** 6, "milliard": 10 ** 9, "milliards": 10 ** 9},
+  hundred=["cent", "cents"], and_words=["et"], point_words=["virgule"])
+NUMBER_TRANSITIONS = {
+  **TENS_AND_TRANSITIONS,
+  # "dix-sept", "soixante-dix", "soixante-douze", "soixante et onze"
+  ('teen_head', 'unit'): 'unit', ('teen', 'unit'): 'unit',
+  ('tens_head', 'teen'): 'teen', ('tens', 'teen'): 'teen', ('tens_and', 'teen'): 'teen',
+}
@@ -0,0 +1,28 @@
+from ..numbers import TENS_AND_TRANSITIONS, build_lexicon
+
+DECIMAL_COMMA = True
+
+EQUIVALENTS = {
+  "você": ["você", "vc"],
+  "vocês": ["vocês", "vcs"],
+  "para": ["para", "pra"],
+  "também": ["também", "tb", "tbm"],
+  "porque": ["porque", "pq"],
+  "está": ["está", "tá"],
+}
+
+# "uma" and "duas" are left out: reading them as numbers would make them interchangeable with "um" and "dois".
+NUMBER_LEXICON = build_lexicon(
+  units={"zero": 0, "um": 1, "dois": 2, "três": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7, "oito": 8,
+         "nove": 9},
+  teens={"dez": 10, "onze": 11, "doze": 12, "treze": 13, "catorze": 14, "quatorze": 14, "quinze": 15,
+         "dezesseis": 16, "dezasseis": 16, "dezessete": 17, "dezassete": 17, "dezoito": 18, "dezenove": 19,
+         "dezanove": 19},
+  tens={"vinte": 20, "trinta": 30, "quarenta": 40, "cinquenta": 50, "sessenta": 60, "setenta": 70,
+        "oitenta": 80, "noventa": 90},
+  scales={"mil": 10 ** 3, "milhão": 10 ** 6, "milhões": 10 ** 6, "bilhão": 10 ** 9, "bilhões": 10 ** 9},
+  hundreds={"cem": 100, "cento": 100, "duzentos": 200, "trezentos": 300, "quatrocentos": 400,
+            "quinhentos": 500, "seiscentos": 600, "setecentos": 700, "oitocentos": 800, "novecentos": 900},
+  and_words=["e"], point_words=["vírgula"])
+# "mil e quinhentos"
+NUMBER_TRANSITIONS = {**TENS_AND_TRANSITIONS, ('and', 'hundreds'): 'hundred'}
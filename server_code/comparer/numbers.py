@@ -0,0 +1,181 @@
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional, Sequence, Tuple
+
+_DIGITS_RE = re.compile(r"^(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?$")
+_ORDINAL_DIGITS_RE = re.compile(r"^(\d+)(?:st|nd|rd|th)$")
+_KEY_STRIP_RE = re.compile(r"^[^\w]+|[^\w]+$")
+# Swaps the separators of "1.000,5" so the digit reader sees "1,000.5".
+_DECIMAL_COMMA_TABLE = str.maketrans('.,', ',.')
+
+
+def build_lexicon(units: Dict[str, int], teens: Dict[str, int], tens: Dict[str, int], scales: Dict[str, int],
+                  hundred: Sequence[str] = (), hundreds: Optional[Dict[str, int]] = None, and_words: Sequence[str] = (),
+                  point_words: Sequence[str] = (), oh_words: Sequence[str] = ()) -> Dict[str, Tuple[str, int, bool]]:
+  """
+  word -> (kind, value, is_ordinal) for one language's cardinal number words; the only
+  per-word data, a few dozen entries. hundred words multiply ("two hundred"), hundreds
+  words carry their own value ("doscientos").
+  """
+  lexicon = {}
+  for kind, words in (('unit', units), ('teen', teens), ('tens', tens), ('scale', scales), ('hundreds', hundreds or {})):
+    for word, value in words.items():
+      lexicon[word] = (kind, value, False)
+  for kind, words in (('hundred', hundred), ('and', and_words), ('point', point_words), ('oh', oh_words)):
+    for word in words:
+      lexicon[word] = (kind, 100 if kind == 'hundred' else 0, False)
+  return lexicon
+
+
+# (state, token kind) -> next state. States are named after the last token read; the
+# "_head" states are a first 10-99 token.
+TRANSITIONS = {
+  ('start', 'unit'): 'unit', ('start', 'teen'): 'teen_head', ('start', 'tens'): 'tens_head',
+  ('start', 'hundred'): 'hundred', ('start', 'scale'): 'scale', ('start', 'digits'): 'digits',
+  ('start', 'point'): 'point', ('start', 'hundreds'): 'hundred',
+  ('unit', 'hundred'): 'hundred', ('unit', 'scale'): 'scale', ('unit', 'point'): 'point',
+  ('teen_head', 'hundred'): 'hundred', ('teen_head', 'scale'): 'scale', ('teen_head', 'point'): 'point',
+  ('tens_head', 'unit'): 'unit', ('tens_head', 'scale'): 'scale', ('tens_head', 'point'): 'point',
+  ('teen', 'scale'): 'scale', ('teen', 'point'): 'point',
+  ('tens', 'unit'): 'unit', ('tens', 'scale'): 'scale', ('tens', 'point'): 'point',
+  ('hundred', 'unit'): 'unit', ('hundred', 'teen'): 'teen', ('hundred', 'tens'): 'tens',
+  ('hundred', 'and'): 'and', ('hundred', 'scale'): 'scale', ('hundred', 'point'): 'point',
+  ('scale', 'unit'): 'unit', ('scale', 'teen'): 'teen', ('scale', 'tens'): 'tens', ('scale', 'and'): 'and',
+  ('scale', 'point'): 'point', ('scale', 'hundreds'): 'hundred',
+  ('and', 'unit'): 'unit', ('and', 'teen'): 'teen', ('and', 'tens'): 'tens',
+  ('digits', 'scale'): 'scale',
+  ('point', 'unit'): 'fraction', ('point', 'oh'): 'fraction',
+  ('fraction', 'unit'): 'fraction', ('fraction', 'oh'): 'fraction',
+}
+# Years read in pairs, as English does: "nineteen eighty(-four)", "twenty nineteen",
+# "twenty twenty-four", "nineteen/twenty oh five". Only an 11-20 head opens a year (see
+# YEAR_HEADS), a teen never follows a teen and a bare tens never follows a tens, so
+# counting ("ten eleven twelve") and repeats ("twenty twenty times") stay separate numbers.
+YEAR_TRANSITIONS = {
+  ('teen_head', 'tens'): 'year_tens', ('teen_head', 'oh'): 'year_oh',
+  ('tens_head', 'teen'): 'year_teen', ('tens_head', 'tens'): 'year_tens_open', ('tens_head', 'oh'): 'year_oh',
+  ('year_oh', 'unit'): 'year_unit',
+  ('year_tens', 'unit'): 'year_unit', ('year_tens_open', 'unit'): 'year_unit',
+}
+YEAR_HEADS = range(11, 21)
+# Tens joined to units by a conjunction ("treinta y dos", "vinte e dois", "vingt et un").
+TENS_AND_TRANSITIONS = {
+  ('tens_head', 'and'): 'tens_and', ('tens', 'and'): 'tens_and', ('tens_and', 'unit'): 'unit',
+}
+# Reading stops in these states without producing a number ("and", "point" and "oh" need a
+# follow-up, and so does the "twenty" of "twenty twenty-").
+INCOMPLETE_STATES = {'start', 'and', 'point', 'year_oh', 'year_tens_open', 'tens_and'}
+
+
+def number_key(text: str) -> Tuple[str, ...]:
+  """The parts a token contributes to a number phrase; hyphenated words give several parts."""
+  key = _KEY_STRIP_RE.sub('', text.lower())
+  if _DIGITS_RE.match(key) or _ORDINAL_DIGITS_RE.match(key):
+    return (key,)
+  return tuple(key.split('-'))
+
+
+def ordinal_suffix(n: int) -> str:
+  if 10 <= n % 100 <= 20:
+    return "th"
+  return {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+
+
+class NumberNormalizer:
+  """
+  Finite-state reader for numbers in digits or words, including multi-token spans.
+
+  match() reads the longest number phrase starting at a position and returns its
+  canonical form: "250" and "two hundred and fifty" give "250", "twenty twenty-four"
+  gives "2024", "3.5" and "three point five" give "3.5", "twenty-first" and "21st" give
+  "21st". The state is a handful of numbers, so memory does not grow with the value,
+  and every token is read once.
+
+  The grammar is shared; each language pack supplies its lexicon (see build_lexicon),
+  any extra transitions, whether years are read in pairs, and whether digits use a
+  decimal comma ("3,5", "1.000").
+  """
+
+  def __init__(self, lexicon: Dict[str, Tuple[str, int, bool]], extra_transitions: Optional[Dict] = None,
+               years: bool = False, decimal_comma: bool = False):
+    self.lexicon = lexicon
+    self.transitions = {**TRANSITIONS, **(YEAR_TRANSITIONS if years else {}), **(extra_transitions or {})}
+    self.open_states = {state for state, _ in self.transitions}
+    self.decimal_comma = decimal_comma
+
+  def _classify(self, part: str):
+    entry = self.lexicon.get(part)
+    if entry is not None or not part[:1].isdigit():
+      return entry
+    if self.decimal_comma:
+      part = part.translate(_DECIMAL_COMMA_TABLE)
+    ordinal = _ORDINAL_DIGITS_RE.match(part)
+    if ordinal:
+      return 'digits', Decimal(ordinal.group(1)), True
+    if _DIGITS_RE.match(part):
+      try:
+        return 'digits', Decimal(part.replace(',', '')), False
+      except InvalidOperation:
+        return None
+    return None
+
+  def match(self, keys: Sequence[Tuple[str, ...]], start: int,
+            breaks: Optional[Sequence[bool]] = None) -> Tuple[int, Optional[str], bool]:
+    """
+    (length, canonical, open) for the longest number phrase starting at keys[start];
+    (0, None, open) when there is none. open is True when the reader was still in the
+    middle of a phrase at the end of keys, so more tokens could change the answer.
+    A phrase never runs into a token i with breaks[i] set (punctuation before it).
+    """
+    state = 'start'
+    total, group, year_head = Decimal(0), Decimal(0), None
+    fraction = ''
+    ordinal = False
+    best_length, best = 0, None
+
+    i = start
+    while i < len(keys):
+      if i > start and breaks is not None and breaks[i]:
+        return best_length, best, False
+      for part in keys[i]:
+        entry = self._classify(part) if not ordinal else None
+        next_state = self.transitions.get((state, entry[0])) if entry is not None else None
+        if next_state is not None and year_head is None and next_state.startswith('year_') \
+            and group not in YEAR_HEADS:
+          next_state = None
+        if next_state is None:
+          return best_length, best, False
+        kind, value, ordinal = entry
+
+        if next_state == 'fraction':
+          fraction += str(value)
+        elif next_state.startswith('year_'):
+          if year_head is None:
+            year_head, group = group, Decimal(0)
+          group += value
+        elif kind == 'hundred':
+          group = (group or 1) * 100
+        elif kind == 'scale':
+          total += (group or 1) * value
+          group = Decimal(0)
+        elif kind in ('unit', 'teen', 'tens', 'hundreds', 'digits'):
+          group += value
+        state = next_state
+
+      i += 1
+      if state not in INCOMPLETE_STATES:
+        best_length, best = i - start, self._canonical(total, group, year_head, fraction, ordinal)
+      if ordinal:
+        return best_length, best, False
+
+    return best_length, best, state in self.open_states
+
+  @staticmethod
+  def _canonical(total: Decimal, group: Decimal, year_head: Optional[Decimal], fraction: str, ordinal: bool) -> str:
+    value = year_head * 100 + group if year_head is not None else total + group
+    if fraction:
+      value = Decimal(f"{int(value)}.{fraction}")
+    if value != value.to_integral_value():
+      return format(value.normalize(), 'f')
+    return f"{int(value)}{ordinal_suffix(int(value))}" if ordinal else str(int(value))
+
@@ -0,0 +1,167 @@
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+from .engine import COMPARE_MODES, DEFAULT_WORK_BUDGET
+from .results import ResultSink, EntryList, MISSING, TYPE_CODES, TYPE_NAMES
+from .tokens import TokenStore
+
+# Transcripts at least this long are split over a process pool; shorter ones run the chunks serially.
+PARALLEL_MIN_WORDS = 5000
+
+_chunk_user: Optional[TokenStore] = None
+_chunk_actual: Optional[TokenStore] = None
+_chunk_mode = 'greedy'
+_chunk_options: Dict = {}
+
+
+def _unique_bigrams(ids) -> Dict[Tuple[int, int], int]:
+  """Bigram -> its position, or -1 when it occurs more than once."""
+  positions = {}
+  for i in range(len(ids) - 1):
+    key = (ids[i], ids[i + 1])
+    positions[key] = -1 if key in positions else i
+  return positions
+
+
+def find_anchors(user: TokenStore, actual: TokenStore, min_gap: int = 50) -> List[Tuple[int, int]]:
+  """
+  (user_idx, actual_idx) of bigrams that occur exactly once in each text, in an order that
+  is increasing on both sides (a longest increasing subsequence), at least min_gap words
+  apart. One linear pass per side plus O(k log k) for the k candidates.
+  """
+  user_bigrams = _unique_bigrams(user.ids)
+  actual_bigrams = _unique_bigrams(actual.ids)
+  candidates = sorted((u, actual_bigrams[key]) for key, u in user_bigrams.items()
+                      if u >= 0 and actual_bigrams.get(key, -1) >= 0)
+
+  # Patience sort on the actual positions; predecessor links rebuild the chain.
+  tails: List[int] = []
+  tail_idx: List[int] = []
+  previous = [-1] * len(candidates)
+  for i, (_, a) in enumerate(candidates):
+    k = bisect_left(tails, a)
+    if k == len(tails):
+      tails.append(a)
+      tail_idx.append(i)
+    else:
+      tails[k] = a
+      tail_idx[k] = i
+    previous[i] = tail_idx[k - 1] if k else -1
+
+  chain = []
+  i = tail_idx[-1] if tail_idx else -1
+  while i >= 0:
+    chain.append(candidates[i])
+    i = previous[i]
+  chain.reverse()
+
+  anchors = []
+  last_u, last_a = 0, 0
+  for u, a in chain:
+    if u - last_u >= min_gap and a - last_a >= min_gap:
+      anchors.append((u, a))
+      last_u, last_a = u, a
+  return anchors
+
+
+class _ChunkRecorder(ResultSink):
+  """
+  Records (type code, index in the full text, transcript position in the full text) so a
+  chunk's entries can be replayed into any sink.
+  """
+  __slots__ = ('entries', 'degraded', 'user_offset', 'actual_offset')
+
+  def __init__(self, user_offset: int, actual_offset: int):
+    self.entries: List[Tuple[int, int, int]] = []
+    self.degraded = False
+    self.user_offset = user_offset
+    self.actual_offset = actual_offset
+
+  def add(self, word_type: str, store, idx: int, actual_idx: int):
+    code = TYPE_CODES[word_type]
+    self.entries.append((code, idx + (self.actual_offset if code == MISSING else self.user_offset),
+                         actual_idx + self.actual_offset))
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def build(self) -> Tuple[List[Tuple[int, int, int]], bool]:
+    return self.entries, self.degraded
+
+
+def _compare_chunk(user: TokenStore, actual: TokenStore, mode: str, options: Dict,
+                   task: Tuple[Tuple[int, int, int, int], Optional[int]]):
+  (u_lo, u_hi, a_lo, a_hi), work_budget = task
+  recorder = _ChunkRecorder(u_lo, a_lo)
+  engine = COMPARE_MODES[mode](**{**options, 'work_budget': work_budget})
+  return engine.compare_tokens(user.slice(u_lo, u_hi), actual.slice(a_lo, a_hi), result=recorder)
+
+
+def _init_chunk_worker(user: TokenStore, actual: TokenStore, mode: str, options: Dict):
+  global _chunk_user, _chunk_actual, _chunk_mode, _chunk_options
+  _chunk_user, _chunk_actual, _chunk_mode, _chunk_options = user, actual, mode, options
+
+
+def _compare_chunk_in_worker(task: Tuple[Tuple[int, int, int, int], Optional[int]]):
+  return _compare_chunk(_chunk_user, _chunk_actual, _chunk_mode, _chunk_options, task)
+
+
+class AnchorSplitComparer:
+  """
+  Splits a long compare at unique-bigram anchors and aligns the pieces independently.
+
+  Each chunk runs from one anchor to the next on both sides, so it starts with its anchor
+  bigram, and is compared by a fresh engine of the given mode. The output is exactly the
+  concatenation of those per-chunk runs; near an anchor it can differ from one run over
+  the whole text, which is the price of the split. engine_options are passed to every
+  chunk's engine, except that the work_budget is shared out between the chunks (see
+  chunk_budgets), so the whole compare stays within it.
+  """
+
+  def __init__(self, mode: str = 'greedy', min_gap: int = 50, max_workers: Optional[int] = None, **engine_options):
+    if mode not in COMPARE_MODES:
+      raise ValueError(f"Unknown compare mode: {mode}")
+    self.mode = mode
+    self.engine_options = engine_options
+    self.min_gap = min_gap
+    self.max_workers = max_workers
+
+  def chunk_bounds(self, user: TokenStore, actual: TokenStore) -> List[Tuple[int, int, int, int]]:
+    cuts = [(0, 0)] + find_anchors(user, actual, self.min_gap) + [(len(user), len(actual))]
+    return [(u_lo, u_hi, a_lo, a_hi) for (u_lo, a_lo), (u_hi, a_hi) in zip(cuts, cuts[1:])]
+
+  def chunk_budgets(self, bounds: List[Tuple[int, int, int, int]]) -> List[Optional[int]]:
+    """Each chunk's share of the work budget, in proportion to its words on both sides."""
+    total = self.engine_options.get('work_budget', DEFAULT_WORK_BUDGET)
+    if total is None:
+      return [None] * len(bounds)
+    sizes = [u_hi - u_lo + a_hi - a_lo for u_lo, u_hi, a_lo, a_hi in bounds]
+    words = sum(sizes) or 1
+    return [total * size // words for size in sizes]
+
+  def compare_tokens(self, user: TokenStore, actual: TokenStore, index=None, result: Optional[ResultSink] = None):
+    result = result if result is not None else EntryList()
+    bounds = self.chunk_bounds(user, actual)
+    tasks = list(zip(bounds, self.chunk_budgets(bounds)))
+
+    chunks = None
+    if len(bounds) > 1 and len(actual) >= PARALLEL_MIN_WORDS and self.max_workers != 1:
+      try:
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_chunk_worker,
+                                 initargs=(user, actual, self.mode, self.engine_options)) as pool:
+          # Anchors are close together in long texts; hand each worker a run of chunks at a time.
+          workers = self.max_workers or os.cpu_count() or 1
+          chunks = list(pool.map(_compare_chunk_in_worker, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+      except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        print(f"Process pool unavailable, comparing chunks serially: {e}")
+    if chunks is None:
+      chunks = [_compare_chunk(user, actual, self.mode, self.engine_options, task) for task in tasks]
+
+    for chunk, degraded in chunks:
+      if degraded:
+        result.mark_degraded()
+      for code, idx, actual_idx in chunk:
+        result.add(TYPE_NAMES[code], actual if code == MISSING else user, idx, actual_idx)
+    return result.build()
@@ -0,0 +1,153 @@
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from .tokens import TokenStore
+
+VOWELS = frozenset('aeiou')
+_FRONT_VOWELS = frozenset('eiy')
+_BACK_VOWELS = frozenset('oa')
+_H_SILENCERS = frozenset('cgpst')
+_SILENT_INITIALS = ('kn', 'gn', 'pn', 'ae', 'wr')
+# Spellings the rules below get wrong, so "won"/"one" and "to"/"two" sound alike.
+_IRREGULAR_KEYS = {'one': 'WN', 'once': 'WNS', 'two': 'T'}
+# Common homophones sound_key cannot tell apart from look-alikes: too few consonants
+# ("to"/"too"/"two") or different vowel spellings ("ate"/"eight"). Each group shares a key
+# no phonetic key can take.
+_HOMOPHONE_GROUPS = (('to', 'too', 'two'), ('ate', 'eight'), ('by', 'buy', 'bye'), ('no', 'know'), ('new', 'knew'),
+                     ('see', 'sea'), ('be', 'bee'), ('so', 'sew'), ('our', 'hour'), ('i', 'eye'))
+_HOMOPHONE_KEYS = {word: f"={group[0]}" for group in _HOMOPHONE_GROUPS for word in group}
+# Fewer consonant sounds than this leaves too little of a word: "in"/"on", "at"/"out".
+MIN_SOUND_CONSONANTS = 2
+
+
+@lru_cache(maxsize=65536)
+def phonetic_key(word: str) -> str:
+  """
+  Metaphone-style consonant key of a word: "their" and "there" are both "0R", "right" and
+  "write" "RT", "phone" and "fone" "FN". Vowels only count at the start of a word. Words
+  without letters get the empty key, which never matches, so number tokens are keyed on
+  their surface spelling ("four" for "4", see TokenStore.surface_ids). Compare words with
+  sound_key, which adds back what this key drops.
+  """
+  w = ''.join(ch for ch in word if 'a' <= ch <= 'z')
+  if not w:
+    return ''
+  if w in _IRREGULAR_KEYS:
+    return _IRREGULAR_KEYS[w]
+  if w.startswith(_SILENT_INITIALS):
+    w = w[1:]
+  elif w[0] == 'x':
+    w = 's' + w[1:]
+  elif w.startswith('wh'):
+    w = 'w' + w[2:]
+
+  key = []
+  n = len(w)
+  for i, ch in enumerate(w):
+    prev = w[i - 1] if i else ''
+    nxt = w[i + 1] if i + 1 < n else ''
+    after = w[i + 2] if i + 2 < n else ''
+    if ch == prev and ch != 'c':
+      continue
+    if ch in VOWELS:
+      if i == 0:
+        key.append('A')
+    elif ch == 'b':
+      if not (prev == 'm' and i == n - 1):
+        key.append('B')
+    elif ch == 'c':
+      if nxt == 'h' or (nxt == 'i' and after == 'a'):
+        key.append('K' if prev == 's' else 'X')
+      elif nxt in _FRONT_VOWELS:
+        if prev != 's':
+          key.append('S')
+      else:
+        key.append('K')
+    elif ch == 'd':
+      key.append('J' if nxt == 'g' and after in _FRONT_VOWELS else 'T')
+    elif ch == 'g':
+      if nxt == 'h' and after not in VOWELS:
+        continue
+      if nxt == 'n' and (i + 2 == n or w[i + 2:] == 'ed'):
+        continue
+      if prev == 'd' and nxt in _FRONT_VOWELS:
+        continue
+      key.append('J' if nxt in _FRONT_VOWELS else 'K')
+    elif ch == 'h':
+      if prev in _H_SILENCERS or (prev in VOWELS and nxt not in VOWELS):
+        continue
+      key.append('H')
+    elif ch == 'k':
+      if prev != 'c':
+        key.append('K')
+    elif ch == 'p':
+      key.append('F' if nxt == 'h' else 'P')
+    elif ch == 'q':
+      key.append('K')
+    elif ch == 's':
+      key.append('X' if nxt == 'h' or (nxt == 'i' and after in _BACK_VOWELS) else 'S')
+    elif ch == 't':
+      if nxt == 'i' and after in _BACK_VOWELS:
+        key.append('X')
+      elif nxt == 'h':
+        key.append('0')
+      elif not (nxt == 'c' and after == 'h'):
+        key.append('T')
+    elif ch == 'v':
+      key.append('V')
+    elif ch in 'wy':
+      if nxt in VOWELS:
+        key.append(ch.upper())
+    elif ch == 'x':
+      key.append('KS')
+    elif ch == 'z':
+      key.append('S')
+    else:
+      key.append(ch.upper())
+  return ''.join(key)
+
+
+@lru_cache(maxsize=65536)
+def sound_key(word: str) -> str:
+  """
+  The key words are compared on: phonetic_key plus the first vowel letter, so "man",
+  "men" and "moon" differ while "there"/"their" and "right"/"write" still match. Keys
+  with fewer than MIN_SOUND_CONSONANTS consonant sounds are empty, except for the
+  listed homophones ("to"/"two", "ate"/"eight").
+  """
+  w = ''.join(ch for ch in word.lower() if 'a' <= ch <= 'z')
+  if w in _HOMOPHONE_KEYS:
+    return _HOMOPHONE_KEYS[w]
+  key = phonetic_key(w)
+  if len(key) - key.startswith('A') < MIN_SOUND_CONSONANTS:
+    return ''
+  vowel = next((ch for i, ch in enumerate(w) if ch in VOWELS or (ch == 'y' and i)), '')
+  return f"{key}/{vowel}"
+
+
+def sounds_alike(a: str, b: str) -> bool:
+  key = sound_key(a)
+  return bool(key) and key == sound_key(b)
+
+
+class PhoneticIndex:
+  """Positions of every bigram of the actual transcript, keyed by the sound keys of the two words' spellings."""
+
+  def __init__(self, actual: TokenStore):
+    self.actual = actual
+    self.positions: Dict[Tuple[str, str], List[int]] = {}
+    strings = actual.vocab.strings
+    keys = [sound_key(strings[token_id]) for token_id in actual.surface_ids]
+    for i in range(len(keys) - 1):
+      if keys[i] and keys[i + 1]:
+        self.positions.setdefault((keys[i], keys[i + 1]), []).append(i)
+
+  def find(self, first: str, second: str, start: int, stop: int) -> Optional[int]:
+    """First position in [start, stop) whose bigram sounds like (first, second)."""
+    candidates = self.positions.get((first, second))
+    if not candidates:
+      return None
+    i = bisect_left(candidates, start)
+    if i < len(candidates) and candidates[i] < stop:
+      return candidates[i]
+    return None
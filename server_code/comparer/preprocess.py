@@ -0,0 +1,248 @@
+from datetime import datetime
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+import anvil
+import anvil.tables as tables
+from anvil.tables import app_tables
+from .cache import LRUCache
+from .languages import DEFAULT_LANGUAGE
+from .tokens import Vocabulary, TokenStore, BigramIndex
+
+
+# One scan over the whole text, the same for the user input and the transcript. Digit groups
+# keep their separators ("3.5", "1,000") so the number reader sees one token; bracketed
+# annotations such as "[Music]" are matched only so that scan_words can drop them.
+WORD_RE = re.compile(r"\[[^\[\]\n]*\]|\d+(?:[.,]\d+)+|\w+(?:['’]\w+)*")
+
+# What may separate the words of one number phrase; anything else (".", ",", a dropped
+# "[Music]") ends it, so "twenty. Twenty" is two numbers.
+_NUMBER_JOIN_RE = re.compile(r"[\s-]*")
+
+
+def scan_words(text: str) -> List[re.Match]:
+  return [m for m in WORD_RE.finditer(text) if text[m.start()] != '[']
+
+
+def append_tokens(store: TokenStore, matches: List[re.Match], timestamps: Optional[List[float]] = None,
+                  hold_open: bool = False) -> List[int]:
+  """
+  Append the words scan_words found in the source string to store in one left-to-right pass.
+  Contraction forms ("do not", "don't") collapse to their group's canonical key and number
+  phrases ("twenty-one", "21") to their canonical value, each as a single token.
+
+  The contraction groups, number words and accent folding come from the language pack of
+  store's vocabulary. A matched word holds only word characters, apostrophes and digit
+  separators, so lowercasing and one translate per key give every normalized form.
+
+  Returns the index in matches where each new token starts, plus the number of words used.
+  With hold_open, stop before a phrase that more words could still extend.
+  """
+  pack = store.vocab.pack
+  words = [m.group() for m in matches]
+  lowered = [w.lower() for w in words]
+  contraction_keys = [w.translate(pack.contraction_table) for w in lowered]
+  number_keys = [(w.translate(pack.fold_table),) for w in lowered]
+  number_breaks = [i > 0 and not _NUMBER_JOIN_RE.fullmatch(m.string, matches[i - 1].end(), m.start())
+                   for i, m in enumerate(matches)]
+  starts = []
+  i = 0
+  while i < len(words):
+    length, canonical, open_phrase = pack.contractions.match(contraction_keys, i)
+    if not length:
+      length, canonical, number_open = pack.numbers.match(number_keys, i, number_breaks)
+      open_phrase = open_phrase or number_open
+    if hold_open and open_phrase:
+      break
+    ts = timestamps[i] if timestamps is not None else 0.0
+    if length:
+      start, end = matches[i].start(), matches[i + length - 1].end()
+      text = matches[i].string[start:end]
+      store.append(text, canonical, ts, start, end, surface=text.lower().translate(pack.normalize_table))
+    else:
+      length = 1
+      store.append(words[i], lowered[i].translate(pack.normalize_table), ts, matches[i].start(), matches[i].end())
+    starts.append(i)
+    i += length
+  starts.append(i)
+  return starts
+
+
+# Timestamps are given per whitespace-separated word (see interpolate_word_timestamps).
+TIMESTAMP_WORD_RE = re.compile(r"\S+")
+
+
+def prepare_actual(actual_transcript: str, timestamps: Optional[List[float]], vocab: Vocabulary) -> TokenStore:
+  word_starts = [m.start() for m in TIMESTAMP_WORD_RE.finditer(actual_transcript)]
+  if timestamps is None:
+    # Two words per second, evenly spaced.
+    timestamps = [i * 0.5 for i in range(len(word_starts))]
+  matches = scan_words(actual_transcript)
+
+  # Each token takes the timestamp of the whitespace-separated word it sits in; words past
+  # the end of timestamps are dropped.
+  token_timestamps = []
+  word = -1
+  for m in matches:
+    while word + 1 < len(word_starts) and word_starts[word + 1] <= m.start():
+      word += 1
+    if word >= len(timestamps):
+      break
+    token_timestamps.append(timestamps[word])
+  del matches[len(token_timestamps):]
+
+  actual = TokenStore(vocab)
+  append_tokens(actual, matches, token_timestamps)
+  return actual
+
+
+def interpolate_word_timestamps(segments: List[Dict]) -> Tuple[str, List[float]]:
+  """
+  Flatten YouTube transcript segments ({'text', 'start', 'duration'}) into the transcript
+  text and one timestamp per whitespace-separated word, spreading each segment's words
+  evenly over its duration. Captions often overlap the next segment, so the spread stops at
+  the next segment's start and the timestamps never decrease (time_slice and TimedComparer
+  bisect on them).
+  """
+  words = []
+  timestamps = []
+  last = 0.0
+  for n, segment in enumerate(segments):
+    segment_words = segment['text'].split()
+    duration = segment.get('duration', 0.0)
+    if n + 1 < len(segments):
+      duration = min(duration, max(0.0, segments[n + 1]['start'] - segment['start']))
+    step = duration / len(segment_words) if segment_words else 0.0
+    for k, word in enumerate(segment_words):
+      last = max(last, segment['start'] + k * step)
+      words.append(word)
+      timestamps.append(last)
+  return ' '.join(words), timestamps
+
+
+def tokenize_user(user_input: str, vocab: Vocabulary) -> TokenStore:
+  user = TokenStore(vocab)
+  append_tokens(user, scan_words(user_input))
+  return user
+
+
+# Bump whenever tokenization or normalization changes, so stored transcripts are rebuilt.
+# The version is not part of the hash: a stale row is found and replaced, not orphaned.
+PREPARED_TRANSCRIPT_VERSION = 7
+
+
+def transcript_hash(actual_transcript: str, timestamps: Optional[List[float]] = None,
+                    language: str = DEFAULT_LANGUAGE) -> str:
+  digest = hashlib.sha256(f"{language}\n".encode('utf-8'))
+  digest.update(actual_transcript.encode('utf-8'))
+  if timestamps is not None:
+    digest.update(json.dumps(list(timestamps)).encode('utf-8'))
+  return digest.hexdigest()
+
+
+class PreparedTranscript:
+  """The official transcript, tokenized, normalized, interned and indexed once per content hash."""
+  __slots__ = ('content_hash', 'actual', 'index')
+
+  def __init__(self, content_hash: str, actual: TokenStore):
+    self.content_hash = content_hash
+    self.actual = actual
+    self.index = BigramIndex(actual)
+
+  def user_tokens(self, user_input: str) -> TokenStore:
+    return tokenize_user(user_input, self.actual.vocab.fork())
+
+  def to_payload(self) -> Dict:
+    actual = self.actual
+    return {
+      'version': PREPARED_TRANSCRIPT_VERSION,
+      'language': actual.vocab.pack.code,
+      'texts': actual.texts,
+      'normalized': [actual.normalized(i) for i in range(len(actual))],
+      'timestamps': list(actual.timestamps),
+      'starts': list(actual.starts),
+      'ends': list(actual.ends)
+    }
+
+  @classmethod
+  def from_payload(cls, content_hash: str, payload: Dict) -> 'PreparedTranscript':
+    # Rebuilding the IDs and the bigram index is a few dict operations per word;
+    # the regex normalization is what the stored payload saves.
+    actual = TokenStore(Vocabulary(payload['language']))
+    normalize_table = actual.vocab.pack.normalize_table
+    for text, normalized, ts, start, end in zip(payload['texts'], payload['normalized'], payload['timestamps'],
+                                                payload['starts'], payload['ends']):
+      actual.append(text, normalized, ts, start, end, surface=text.lower().translate(normalize_table))
+    return cls(content_hash, actual)
+
+
+PREPARED_TRANSCRIPTS = LRUCache(max_entries=32)
+
+
+def _load_prepared_transcript(content_hash: str) -> Optional[PreparedTranscript]:
+  try:
+    row = app_tables.prepared_transcripts.get(content_hash=content_hash)
+    if row is None:
+      return None
+    payload = json.loads(row['payload'].get_bytes())
+    if payload.get('version') != PREPARED_TRANSCRIPT_VERSION:
+      return None
+    return PreparedTranscript.from_payload(content_hash, payload)
+  except Exception as e:
+    print(f"Could not load prepared transcript {content_hash}: {e}")
+    return None
+
+
+@tables.in_transaction
+def _put_prepared_transcript_row(content_hash: str, payload):
+  # One row per hash: a concurrent miss that stored it first is overwritten, not duplicated,
+  # and duplicates left from before are dropped.
+  rows = list(app_tables.prepared_transcripts.search(content_hash=content_hash))
+  for extra in rows[1:]:
+    extra.delete()
+  if rows:
+    rows[0].update(payload=payload, created=datetime.now())
+  else:
+    app_tables.prepared_transcripts.add_row(content_hash=content_hash, payload=payload, created=datetime.now())
+
+
+def _store_prepared_transcript(prepared: PreparedTranscript):
+  try:
+    payload = anvil.BlobMedia('application/json', json.dumps(prepared.to_payload()).encode('utf-8'),
+                              name=f"{prepared.content_hash}.json")
+    _put_prepared_transcript_row(prepared.content_hash, payload)
+  except Exception as e:
+    print(f"Could not store prepared transcript {prepared.content_hash}: {e}")
+
+
+def find_prepared_transcript(content_hash: str) -> Optional[PreparedTranscript]:
+  """The transcript prepared (with persist=True) under content_hash, from this worker's LRU or the table."""
+  prepared = PREPARED_TRANSCRIPTS.get(content_hash)
+  if prepared is None:
+    prepared = _load_prepared_transcript(content_hash)
+    if prepared is not None:
+      PREPARED_TRANSCRIPTS.put(content_hash, prepared)
+  return prepared
+
+
+def prepare_transcript(actual_transcript: str, timestamps: Optional[List[float]] = None,
+                       persist: bool = False, language: str = DEFAULT_LANGUAGE) -> PreparedTranscript:
+  """
+  Return the prepared form of actual_transcript from this worker's LRU, tokenizing it on
+  a miss. With persist=True the prepared_transcripts table is tried before tokenizing
+  and written after; pass it only for transcripts that will be compared again (YouTube
+  transcripts, batches, live sessions), not for one-off pasted text.
+  """
+  content_hash = transcript_hash(actual_transcript, timestamps, language)
+  prepared = PREPARED_TRANSCRIPTS.get(content_hash)
+  if prepared is not None:
+    return prepared
+
+  prepared = _load_prepared_transcript(content_hash) if persist else None
+  if prepared is None:
+    prepared = PreparedTranscript(content_hash, prepare_actual(actual_transcript, timestamps, Vocabulary(language)))
+    if persist:
+      _store_prepared_transcript(prepared)
+  PREPARED_TRANSCRIPTS.put(content_hash, prepared)
+  return prepared
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Dict
+from anvil.tables import app_tables
+
+# Profiled compares slower than this are kept in the compare_profiles table.
+SLOW_COMPARE_MS = 1000.0
+
+
+class CompareProfile:
+  """
+  Per-phase counters and perf_counter timings of one compare.
+
+  Engines hold None instead of a profile unless profiling was asked for, and only touch it
+  behind an `is not None` check at phase boundaries, so a normal compare pays for a few
+  attribute tests and nothing per word. Timings nest: 'realign' includes the gap filling
+  and fuzzy matching done inside it, and everything is inside 'total'.
+  """
+  __slots__ = ('counters', 'seconds', 'largest_gap')
+
+  def __init__(self):
+    self.counters: Dict[str, int] = {}
+    self.seconds: Dict[str, float] = {}
+    self.largest_gap = (0, 0)
+
+  def count(self, name: str, n: int = 1):
+    self.counters[name] = self.counters.get(name, 0) + n
+
+  def record(self, name: str, seconds: float):
+    """Add one call of phase name that took seconds."""
+    self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+    self.count(name)
+
+  def gap(self, user_len: int, actual_len: int):
+    self.count('gap_pairs', user_len * actual_len)
+    if user_len * actual_len > self.largest_gap[0] * self.largest_gap[1]:
+      self.largest_gap = (user_len, actual_len)
+
+  @property
+  def total_ms(self) -> float:
+    return self.seconds.get('total', 0.0) * 1000
+
+  def to_dict(self) -> Dict:
+    return {
+      'timings_ms': {name: round(s * 1000, 3) for name, s in self.seconds.items()},
+      'counters': dict(self.counters),
+      'largest_gap': list(self.largest_gap)
+    }
+
+
+def record_slow_compare(profile: CompareProfile, mode: str, transcript: str, user_input: str):
+  """Keep the profile and the input of a slow compare, so the pathological case can be replayed."""
+  if profile.total_ms < SLOW_COMPARE_MS:
+    return
+  try:
+    app_tables.compare_profiles.add_row(created=datetime.now(), mode=mode, transcript=transcript,
+                                        user_input=user_input, total_ms=profile.total_ms, profile=profile.to_dict())
+  except Exception as e:
+    print(f"Could not record compare profile: {e}")
@@ -0,0 +1,194 @@
+from html import escape
+from typing import Dict, List, Optional
+
+# Wire codes of the compact format; also the order of the type names in TYPE_NAMES.
+TYPE_NAMES = ('correct', 'mistake', 'missing', 'wrong')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+MISSING = TYPE_CODES['missing']
+
+
+class ResultSink:
+  """
+  Where the engines write their entries. Each entry is a type name and the token it
+  shows: missing entries come from the transcript, every other type from the user input.
+  actual_idx is the transcript position the entry belongs to: the matched word of a correct
+  or mistake entry, the word itself for missing, and for wrong the transcript word the
+  engine had reached.
+  """
+  __slots__ = ()
+
+  def add(self, word_type: str, store, idx: int, actual_idx: int):
+    raise NotImplementedError
+
+  def __len__(self) -> int:
+    raise NotImplementedError
+
+  def build(self):
+    raise NotImplementedError
+
+  def mark_degraded(self):
+    """The engine ran out of work budget and aligned the rest with its cheap fallback."""
+    self.degraded = True
+
+
+class EntryList(ResultSink):
+  """The default result: one {'text', 'type'} dict per entry."""
+  __slots__ = ('entries', 'degraded')
+
+  def __init__(self):
+    self.entries: List[Dict[str, str]] = []
+    self.degraded = False
+
+  def add(self, word_type: str, store, idx: int, actual_idx: int):
+    self.entries.append({'text': store.texts[idx], 'type': word_type})
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def build(self) -> List[Dict[str, str]]:
+    return self.entries
+
+
+class CompactResult(ResultSink):
+  """
+  Run-length encoded result for the wire, without any word text.
+
+  'runs' alternates a type code (TYPE_NAMES index) and how many entries in a row have it.
+  'offsets' holds two ints per entry: where the word starts, counted from the end of the
+  previous entry taken from the same string, and its length. The client rebuilds every
+  text by slicing the user input and the transcript it sent (see client_code/compact_result).
+  """
+  __slots__ = ('runs', 'offsets', 'count', 'degraded', '_last_end')
+
+  def __init__(self):
+    self.runs: List[int] = []
+    self.offsets: List[int] = []
+    self.count = 0
+    self.degraded = False
+    self._last_end = [0, 0]
+
+  def add(self, word_type: str, store, idx: int, actual_idx: int):
+    code = TYPE_CODES[word_type]
+    runs = self.runs
+    if runs and runs[-2] == code:
+      runs[-1] += 1
+    else:
+      runs += (code, 1)
+    side = code == MISSING
+    start = store.starts[idx]
+    self.offsets += (start - self._last_end[side], store.ends[idx] - start)
+    self._last_end[side] = store.ends[idx]
+    self.count += 1
+
+  def __len__(self) -> int:
+    return self.count
+
+  def build(self) -> Dict:
+    return {'format': 'rle1', 'count': self.count, 'runs': self.runs, 'offsets': self.offsets,
+            'degraded': self.degraded}
+
+
+class TimestampColumns(ResultSink):
+  """
+  Wraps another sink and also records, in two columns with one value per entry, where in
+  actual each entry belongs: 'positions' holds the character offset of that transcript word
+  in the transcript text and 'timestamps' its time in seconds, so the client can seek the
+  player to any entry. Entries past the last transcript word take its end and timestamp.
+  build() returns {'result': the wrapped sink's build(), 'positions', 'timestamps'}.
+  """
+  __slots__ = ('inner', 'actual', 'positions', 'timestamps', 'degraded')
+
+  def __init__(self, actual, inner: Optional[ResultSink] = None):
+    self.inner = inner if inner is not None else EntryList()
+    self.actual = actual
+    self.positions: List[int] = []
+    self.timestamps: List[float] = []
+    self.degraded = False
+
+  def add(self, word_type: str, store, idx: int, actual_idx: int):
+    self.inner.add(word_type, store, idx, actual_idx)
+    actual = self.actual
+    if actual_idx < len(actual):
+      self.positions.append(actual.starts[actual_idx])
+      self.timestamps.append(round(actual.timestamps[actual_idx], 3))
+    elif len(actual):
+      self.positions.append(actual.ends[-1])
+      self.timestamps.append(round(actual.timestamps[-1], 3))
+    else:
+      self.positions.append(0)
+      self.timestamps.append(0.0)
+
+  def mark_degraded(self):
+    self.degraded = True
+    self.inner.mark_degraded()
+
+  def __len__(self) -> int:
+    return len(self.inner)
+
+  def build(self) -> Dict:
+    return {'result': self.inner.build(), 'positions': self.positions, 'timestamps': self.timestamps}
+
+
+HTML_COLORS = {'correct': 'green', 'mistake': 'orange', 'missing': 'blue', 'wrong': 'red'}
+
+
+class HtmlResult(ResultSink):
+  """
+  Renders entries to HTML as the engine emits them. Consecutive entries of one type share
+  a single span, word text is escaped, and the type counters for the stats are kept on the
+  way, so the result is never walked a second time.
+  """
+  __slots__ = ('colors', 'counts', 'count', 'degraded', '_parts', '_run_type', '_run')
+
+  def __init__(self, colors: Optional[Dict[str, str]] = None):
+    self.colors = colors or HTML_COLORS
+    self.counts = dict.fromkeys(TYPE_NAMES, 0)
+    self.count = 0
+    self.degraded = False
+    self._parts: List[str] = []
+    self._run_type = None
+    self._run: List[str] = []
+
+  def add(self, word_type: str, store, idx: int, actual_idx: int):
+    self.counts[word_type] += 1
+    self.count += 1
+    if word_type != self._run_type:
+      self._close_run()
+      self._run_type = word_type
+    self._run.append(store.texts[idx])
+
+  def _close_run(self):
+    if self._run:
+      self._parts.append(f"<span style='color:{self.colors[self._run_type]}'>{escape(' '.join(self._run))}</span>")
+      self._run = []
+
+  def __len__(self) -> int:
+    return self.count
+
+  def build(self) -> Dict:
+    self._close_run()
+    counts = self.counts
+    return {
+      "html": ' '.join(self._parts),
+      "stats": build_stats(counts['correct'], counts['mistake'], counts['missing'], counts['wrong']),
+      "degraded": self.degraded
+    }
+
+
+def build_stats(correct: int, mistake: int, missing: int, wrong: int) -> Dict:
+  total_attempted = correct + mistake + wrong
+  accuracy = round(100 * correct / total_attempted, 1) if total_attempted else 0.0
+  return {
+    "accuracy": accuracy,
+    "correct": correct,
+    "incorrect": mistake + wrong,
+    "missing": missing
+  }
+
+
+def summarize_result(result: List[Dict[str, str]]) -> Dict:
+  counts = {'correct': 0, 'mistake': 0, 'missing': 0, 'wrong': 0}
+  for entry in result:
+    if entry['type'] in counts:
+      counts[entry['type']] += 1
+  return build_stats(counts['correct'], counts['mistake'], counts['missing'], counts['wrong'])
@@ -0,0 +1,149 @@
+from typing import Tuple
+from .phonetic import sound_key
+from .results import ResultSink
+from .tokens import TokenStore
+
+
+class GreedyBigramRealign:
+  """
+  Resync on the first user bigram that also occurs in the transcript before
+  engine.search_stop() (looked up in the bigram index), filling the skipped stretch
+  with fill_field_gaps.
+  """
+
+  def realign(self, engine, user: TokenStore, user_start_idx: int, actual: TokenStore, actual_start_idx: int,
+              result: ResultSink, matched_once: bool) -> Tuple[int, int]:
+    index = engine.bigram_index(actual)
+    stop = engine.search_stop(user_start_idx, actual, actual_start_idx)
+
+    if engine.profile is not None:
+      engine.profile.count('realign_window_words', stop - actual_start_idx)
+
+    user_ids = user.ids
+    for user_offset in range(len(user_ids) - user_start_idx - 1):
+      first = user_start_idx + user_offset
+      full_target_start_idx = index.find(user.keys(first), user.keys(first + 1),
+                                         actual_start_idx, stop, engine.window_size)
+      if full_target_start_idx is None:
+        continue
+      engine.spend(user_offset + 1, result)
+      if engine.profile is not None:
+        engine.profile.count('bigram_lookups', user_offset + 1)
+
+      if not matched_once and full_target_start_idx > 0:
+        for idx in range(actual_start_idx, full_target_start_idx):
+          result.add('missing', actual, idx, idx)
+
+      engine.fill_field_gaps(
+        user.span(user_start_idx, first),
+        actual.span(actual_start_idx, full_target_start_idx),
+        result
+      )
+
+      result.add('correct', user, first, full_target_start_idx)
+      result.add('correct', user, first + 1, full_target_start_idx + 1)
+      return first + 2, full_target_start_idx + 2
+
+    engine.spend(max(0, len(user_ids) - user_start_idx - 1), result)
+    if engine.profile is not None:
+      engine.profile.count('bigram_lookups', max(0, len(user_ids) - user_start_idx - 1))
+    return user_start_idx, actual_start_idx
+
+
+class LinearFallbackRealign:
+  """
+  Scan forward through the rest of the transcript for the current user word alone.
+
+  Every scanned word costs one unit of the engine's work budget and every fuzzy comparison
+  FUZZY_SCAN_COST more, charged as the scan goes, so unrelated input degrades the compare
+  after a bounded number of comparisons instead of scanning the whole transcript per word.
+  """
+
+  # A fuzzy comparison costs about as much as this many bigram lookups or gap pairs.
+  FUZZY_SCAN_COST = 8
+
+  def realign(self, engine, user: TokenStore, user_start_idx: int, actual: TokenStore, actual_start_idx: int,
+              result: ResultSink, matched_once: bool) -> Tuple[int, int]:
+    match = None
+    actual_idx = actual_start_idx
+    for actual_idx in range(actual_start_idx, len(actual)):
+      if engine.equivalent_at(user, user_start_idx, actual, actual_idx):
+        match = 'correct'
+        break
+      if not engine.spend(1 + self.FUZZY_SCAN_COST, result):
+        break
+      if engine.is_mistake_at(user, user_start_idx, actual, actual_idx):
+        match = 'mistake'
+        break
+    else:
+      actual_idx = len(actual)
+
+    if engine.profile is not None:
+      engine.profile.count('linear_scan_words', actual_idx - actual_start_idx + (match is not None))
+    if match is None:
+      return user_start_idx, actual_start_idx
+    engine.spend(1, result)
+    if not matched_once and actual_idx > 0:
+      for idx in range(actual_start_idx, actual_idx):
+        result.add('missing', actual, idx, idx)
+    result.add(match, user, user_start_idx, actual_idx)
+    return user_start_idx + 1, actual_idx + 1
+
+
+class OffsetRealign:
+  """
+  Lightweight resync: skip up to max_offset words on both sides when the words right after
+  them line up again. The skipped transcript words are missing, the skipped user words wrong.
+  Before the first match the skipped transcript words are left to the engine, which marks
+  everything ahead of that match missing once it lands on the realigned pair.
+  """
+
+  def __init__(self, max_offset: int = 3):
+    self.max_offset = max_offset
+
+  def realign(self, engine, user: TokenStore, user_start_idx: int, actual: TokenStore, actual_start_idx: int,
+              result: ResultSink, matched_once: bool) -> Tuple[int, int]:
+    for offset in range(1, self.max_offset + 1):
+      user_idx, actual_idx = user_start_idx + offset, actual_start_idx + offset
+      if user_idx >= len(user) or actual_idx >= len(actual):
+        break
+      if engine.equivalent_at(user, user_idx, actual, actual_idx):
+        if matched_once:
+          for idx in range(actual_start_idx, actual_idx):
+            result.add('missing', actual, idx, idx)
+        for idx in range(user_start_idx, user_idx):
+          result.add('wrong', user, idx, actual_start_idx + idx - user_start_idx)
+        return user_idx, actual_idx
+
+    return user_start_idx, actual_start_idx
+
+
+class PhoneticRealign:
+  """
+  Resync on the current user bigram by sound: the first transcript position before
+  engine.search_stop() whose two words have the same sound keys ("there fore" for
+  "their four"), looked up in the phonetic index. Both user words become mistakes, or
+  correct where equivalent, and the skipped transcript words are missing.
+  """
+
+  def realign(self, engine, user: TokenStore, user_start_idx: int, actual: TokenStore, actual_start_idx: int,
+              result: ResultSink, matched_once: bool) -> Tuple[int, int]:
+    if user_start_idx + 1 >= len(user):
+      return user_start_idx, actual_start_idx
+    first = sound_key(user.surface(user_start_idx))
+    second = sound_key(user.surface(user_start_idx + 1))
+    if not first or not second:
+      return user_start_idx, actual_start_idx
+
+    stop = engine.search_stop(user_start_idx, actual, actual_start_idx)
+    target = engine.phonetic_index(actual).find(first, second, actual_start_idx, stop)
+    engine.spend(1, result)
+    if target is None:
+      return user_start_idx, actual_start_idx
+
+    for idx in range(actual_start_idx, target):
+      result.add('missing', actual, idx, idx)
+    for offset in (0, 1):
+      word_type = 'correct' if engine.equivalent_at(user, user_start_idx + offset, actual, target + offset) else 'mistake'
+      result.add(word_type, user, user_start_idx + offset, target + offset)
+    return user_start_idx + 2, target + 2
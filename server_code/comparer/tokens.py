@@ -0,0 +1,236 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import ChainMap
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .languages import DEFAULT_LANGUAGE, LanguagePack, language_pack
+
+
+@dataclass(slots=True)
+class Word:
+  text: str
+  timestamp: float
+  normalized: str = ""
+
+
+class _Overlay:
+  """A list that reads through to a base list it never modifies; appends go to its own part."""
+  __slots__ = ('base', 'size', 'own')
+
+  def __init__(self, base: list):
+    self.base = base
+    self.size = len(base)
+    self.own = []
+
+  def __getitem__(self, i: int):
+    return self.base[i] if i < self.size else self.own[i - self.size]
+
+  def __len__(self) -> int:
+    return self.size + len(self.own)
+
+  def append(self, value):
+    self.own.append(value)
+
+
+class Vocabulary:
+  """
+  Interns normalized words to small integer IDs shared by both sides of a compare.
+
+  Two IDs are equivalent when they are equal or their equivalence masks share a bit.
+  keys[id] holds the hash keys used by BigramIndex: the ID itself and one negative
+  key per equivalence class (-1 - class_id), so the two kinds never collide.
+
+  A cached transcript's vocabulary is forked for each user input, so the user side's
+  vocabulary is always a superset of the actual side's, in the same language.
+  """
+  __slots__ = ('pack', 'ids', 'strings', 'masks', 'keys')
+
+  def __init__(self, language: str = DEFAULT_LANGUAGE):
+    self.pack: LanguagePack = language_pack(language)
+    self.ids: Dict[str, int] = {}
+    self.strings: List[str] = []
+    self.masks: List[int] = []
+    self.keys: List[Tuple[int, ...]] = []
+
+  def __len__(self) -> int:
+    return len(self.strings)
+
+  def intern(self, normalized: str) -> int:
+    token_id = self.ids.get(normalized)
+    if token_id is None:
+      token_id = len(self.strings)
+      mask = self.pack.equivalence_mask(normalized)
+      keys = [token_id]
+      remaining = mask
+      while remaining:
+        bit = remaining & -remaining
+        keys.append(-bit.bit_length())
+        remaining ^= bit
+      self.ids[normalized] = token_id
+      self.strings.append(normalized)
+      self.masks.append(mask)
+      self.keys.append(tuple(keys))
+    return token_id
+
+  def fork(self) -> 'Vocabulary':
+    """A copy that can intern more words without growing this vocabulary."""
+    child = Vocabulary(self.pack.code)
+    child.ids = dict(self.ids)
+    child.strings = list(self.strings)
+    child.masks = list(self.masks)
+    child.keys = list(self.keys)
+    return child
+
+  def overlay(self) -> 'Vocabulary':
+    """
+    Like fork(), but reading through to this vocabulary instead of copying it: constant
+    cost to make and a little slower to index, for inputs of a few words. This vocabulary
+    must not intern anything while the overlay is in use.
+    """
+    child = Vocabulary(self.pack.code)
+    child.ids = ChainMap({}, self.ids)
+    child.strings = _Overlay(self.strings)
+    child.masks = _Overlay(self.masks)
+    child.keys = _Overlay(self.keys)
+    return child
+
+  def equivalent(self, id1: int, id2: int) -> bool:
+    return id1 == id2 or bool(self.masks[id1] & self.masks[id2])
+
+  def __getstate__(self):
+    # Pool workers load the pack themselves (once each) instead of unpickling its tables.
+    return self.pack.code, self.ids, self.strings, self.masks, self.keys
+
+  def __setstate__(self, state):
+    code, self.ids, self.strings, self.masks, self.keys = state
+    self.pack = language_pack(code)
+
+
+class TokenStore:
+  """
+  One tokenized text as parallel arrays: display texts, interned IDs, timestamps and the
+  [start, end) character offsets of each token in the source string.
+
+  surface_ids holds the interned spelling of tokens that normalization collapsed ("forty"
+  for "40", "eighth" for "8th", "dont" for "don't"); for every other token it is the
+  token's own ID. Two tokens with the same surface are equivalent, so a contraction typed
+  without its apostrophe matches that contraction but not its long form ("dont" is "don't",
+  not "do not"), and misspellings of collapsed tokens can still be fuzzy matched.
+  """
+  __slots__ = ('vocab', 'texts', 'ids', 'surface_ids', 'timestamps', 'starts', 'ends')
+
+  def __init__(self, vocab: Vocabulary):
+    self.vocab = vocab
+    self.texts: List[str] = []
+    self.ids = array('l')
+    self.surface_ids = array('l')
+    self.timestamps = array('d')
+    self.starts = array('l')
+    self.ends = array('l')
+
+  @classmethod
+  def from_words(cls, words: List[Word], vocab: Vocabulary) -> 'TokenStore':
+    store = cls(vocab)
+    for w in words:
+      store.append(w.text, w.normalized, w.timestamp)
+    return store
+
+  def append(self, text: str, normalized: str, timestamp: float = 0.0, start: int = 0, end: int = 0,
+             surface: Optional[str] = None):
+    token_id = self.vocab.intern(normalized)
+    self.texts.append(text)
+    self.ids.append(token_id)
+    self.surface_ids.append(token_id if surface is None or surface == normalized else self.vocab.intern(surface))
+    self.timestamps.append(timestamp)
+    self.starts.append(start)
+    self.ends.append(end)
+
+  def __len__(self) -> int:
+    return len(self.ids)
+
+  def normalized(self, i: int) -> str:
+    return self.vocab.strings[self.ids[i]]
+
+  def surface(self, i: int) -> str:
+    return self.vocab.strings[self.surface_ids[i]]
+
+  def keys(self, i: int) -> Tuple[int, ...]:
+    """The equivalence keys of token i (see Vocabulary.keys), plus its surface ID if it was collapsed."""
+    token_id, surface_id = self.ids[i], self.surface_ids[i]
+    keys = self.vocab.keys[token_id]
+    return keys if surface_id == token_id else keys + (surface_id,)
+
+  def word(self, i: int) -> Word:
+    return Word(text=self.texts[i], timestamp=self.timestamps[i], normalized=self.normalized(i))
+
+  def span(self, start: int, stop: int) -> 'TokenSpan':
+    return TokenSpan(self, start, stop)
+
+  def slice(self, start: int, stop: int) -> 'TokenStore':
+    """A copy of tokens [start, stop) sharing this store's vocabulary."""
+    store = TokenStore(self.vocab)
+    store.texts = self.texts[start:stop]
+    store.ids = self.ids[start:stop]
+    store.surface_ids = self.surface_ids[start:stop]
+    store.timestamps = self.timestamps[start:stop]
+    store.starts = self.starts[start:stop]
+    store.ends = self.ends[start:stop]
+    return store
+
+  def time_slice(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> 'TokenStore':
+    """The tokens whose timestamps fall in [start_time, end_time]; timestamps must be ascending."""
+    start = bisect_left(self.timestamps, start_time) if start_time is not None else 0
+    stop = bisect_right(self.timestamps, end_time) if end_time is not None else len(self)
+    return self.slice(start, stop)
+
+
+class TokenSpan:
+  """A [start, stop) window of a TokenStore; ids is a memoryview, so nothing is copied."""
+  __slots__ = ('store', 'start', 'stop', 'ids')
+
+  def __init__(self, store: TokenStore, start: int, stop: int):
+    self.store = store
+    self.start = start
+    self.stop = stop
+    self.ids = memoryview(store.ids)[start:stop]
+
+  def __len__(self) -> int:
+    return self.stop - self.start
+
+  def text(self, i: int) -> str:
+    return self.store.texts[self.start + i]
+
+
+class BigramIndex:
+  """Positions of every bigram of the actual transcript, keyed by the tokens' equivalence keys (TokenStore.keys)."""
+
+  def __init__(self, actual: TokenStore):
+    self.actual = actual
+    self.positions: Dict[tuple, List[int]] = {}
+    keys = [actual.keys(i) for i in range(len(actual))]
+    for i in range(len(keys) - 1):
+      for first in keys[i]:
+        for second in keys[i + 1]:
+          self.positions.setdefault((first, second), []).append(i)
+
+  def find(self, first_keys: tuple, second_keys: tuple, start: int, stop: int, window_size: int) -> Optional[int]:
+    """
+    First position p in [start, stop) whose bigram shares keys with (first_keys, second_keys).
+
+    Positions where (p - start) is the last slot of a window_size window are skipped,
+    matching the windowed scan this index replaces (bigrams never straddled two windows).
+    """
+    best = None
+    for k1 in first_keys:
+      for k2 in second_keys:
+        candidates = self.positions.get((k1, k2))
+        if not candidates:
+          continue
+        limit = stop if best is None else best
+        i = bisect_left(candidates, start)
+        while i < len(candidates) and candidates[i] < limit:
+          if (candidates[i] - start) % window_size != window_size - 1:
+            best = candidates[i]
+            break
+          i += 1
+    return best
@@ -1,193 +1,138 @@
-import re
-from typing import List, Dict
-from dataclasses import dataclass
-from difflib import SequenceMatcher
+from typing import List, Dict, Optional
 import anvil.server
-from transcription_equivalents import are_equivalent
-
-
-@dataclass
-class Word:
-  text: str
-  timestamp: float
-  normalized: str = ""
-
-class TranscriptionComparerV4Pro:
-  def __init__(self, mistake_threshold: float = 0.75, window_size: int = 20, max_search: int = 200):
-    self.mistake_threshold = mistake_threshold
-    self.window_size = window_size
-    self.max_search = max_search
-
-  def compare(self, user_words: List[Word], actual_words: List[Word]) -> List[Dict[str, str]]:
-    result = []
-    user_idx = 0
-    actual_idx = 0
-    matched_once = False
-
-    while user_idx < len(user_words) and actual_idx < len(actual_words):
-      if are_equivalent(user_words[user_idx].normalized, actual_words[actual_idx].normalized):
-        if not matched_once and actual_idx > 0:
-          for idx in range(actual_idx):
-            result.append({'text': actual_words[idx].text, 'type': 'missing'})
-        matched_once = True
-        result.append({'text': user_words[user_idx].text, 'type': 'correct'})
-        user_idx += 1
-        actual_idx += 1
-        continue
-
-      if self.is_mistake(user_words[user_idx].normalized, actual_words[actual_idx].normalized):
-        if not matched_once and actual_idx > 0:
-          for idx in range(actual_idx):
-            result.append({'text': actual_words[idx].text, 'type': 'missing'})
-        matched_once = True
-        result.append({'text': user_words[user_idx].text, 'type': 'mistake'})
-        user_idx += 1
-        actual_idx += 1
-        continue
-
-      last_result_len = len(result)
-      user_idx, actual_idx = self.realign_with_dubles(user_words, user_idx, actual_words, actual_idx, result, matched_once)
-
-      if len(result) == last_result_len:
-        result.append({'text': user_words[user_idx].text, 'type': 'wrong'})
-        result.append({'text': actual_words[actual_idx].text, 'type': 'missing'})
-        user_idx += 1
-        actual_idx += 1
-
-    while user_idx < len(user_words):
-      result.append({'text': user_words[user_idx].text, 'type': 'wrong'})
-      user_idx += 1
-
-    while actual_idx < len(actual_words):
-      result.append({'text': actual_words[actual_idx].text, 'type': 'missing'})
-      actual_idx += 1
-
-    return result
-
-  def realign_with_dubles(self, user_words, user_start_idx, actual_words, actual_start_idx, result, matched_once):
-    user_new_world = user_words[user_start_idx:]
-    actual_target = actual_words[actual_start_idx:]
-    user_dubles = self.generate_dubles(user_new_world)
-
-    for user_offset, duble_user in enumerate(user_dubles):
-      for window_start in range(0, min(len(actual_target), self.max_search), self.window_size):
-        window_end = min(window_start + self.window_size, len(actual_target))
-        window = actual_target[window_start:window_end]
-        target_dubles = self.generate_dubles(window)
-
-        for target_offset, duble_target in enumerate(target_dubles):
-          if self.are_dubles_equivalent(duble_user, duble_target):
-            full_target_start_idx = actual_start_idx + window_start + target_offset
-
-            if not matched_once and full_target_start_idx > 0:
-              for idx in range(actual_start_idx, full_target_start_idx):
-                result.append({'text': actual_words[idx].text, 'type': 'missing'})
-
-            self.fill_field_gaps(
-              user_words[user_start_idx:user_start_idx + user_offset],
-              actual_words[actual_start_idx:full_target_start_idx],
-              result
-            )
-
-            for w in duble_user:
-              result.append({'text': w.text, 'type': 'correct'})
-            return user_start_idx + user_offset + 2, full_target_start_idx + 2
-
-    return user_start_idx, actual_start_idx
-
-  def generate_dubles(self, words: List[Word]) -> List[List[Word]]:
-    return [[words[i], words[i + 1]] for i in range(len(words) - 1)]
-
-  def are_dubles_equivalent(self, duble1: List[Word], duble2: List[Word]) -> bool:
-    return all(are_equivalent(w1.normalized, w2.normalized) for w1, w2 in zip(duble1, duble2))
-
-  def fill_field_gaps(self, user_gap: List[Word], actual_gap: List[Word], result: List[Dict[str, str]]):
-    user_used = [False] * len(user_gap)
-
-    for aw in actual_gap:
-      matched = False
-      for i, uw in enumerate(user_gap):
-        if not user_used[i] and are_equivalent(uw.normalized, aw.normalized):
-          result.append({'text': uw.text, 'type': 'correct'})
-          user_used[i] = True
-          matched = True
-          break
-      if not matched:
-        for i, uw in enumerate(user_gap):
-          if not user_used[i] and self.is_mistake(uw.normalized, aw.normalized):
-            result.append({'text': uw.text, 'type': 'mistake'})
-            user_used[i] = True
-            matched = True
-            break
-      if not matched:
-        result.append({'text': aw.text, 'type': 'missing'})
-
-    for i, used in enumerate(user_used):
-      if not used:
-        result.append({'text': user_gap[i].text, 'type': 'wrong'})
-
-  def is_mistake(self, user_norm: str, actual_norm: str) -> bool:
-    return SequenceMatcher(None, user_norm, actual_norm).ratio() >= self.mistake_threshold
-
-
-def normalize_text(text):
-  text = re.sub(r'\[.*?\]', '', text)
-  text = re.sub(r'[^\w\s]', '', text)
-  text = re.sub(r'\s+', ' ', text).strip().lower()
-  return text
+from comparer import (COMPARE_MODES, DEFAULT_LANGUAGE, MAX_BATCH_SIZE, AnchorSplitComparer, CompactResult,
+                      EntryList, HtmlResult, IncrementalComparer, ResultSink, TimedComparer, TimestampColumns,
+                      grade_batch, interpolate_word_timestamps, prepare_transcript, record_slow_compare)
 
 
 @anvil.server.callable
-def validate_transcription_comparer(user_input: str, actual_transcript: str, timestamps: List[float] = None) -> List[Dict[str, str]]:
-  if timestamps is None:
-    words = actual_transcript.split()
-    total_duration = len(words) / 2
-    timestamps = [i * (total_duration / len(words)) for i in range(len(words))]
+def validate_transcription_comparer(user_input: str, actual_transcript: str, timestamps: List[float] = None, mode: str = 'greedy',
+                                    compact: bool = False, parallel: bool = False, profile: bool = False,
+                                    phonetic: bool = False, language: str = DEFAULT_LANGUAGE, positions: bool = False,
+                                    report_degraded: bool = False):
+  """
+  Returns one {'text', 'type'} dict per entry, or with compact=True the run-length encoded
+  form that client_code/compact_result.decode_compact_result turns back into that list;
+  its 'degraded' flag is set when the input was too noisy to align within the work budget.
+
+  parallel=True splits long transcripts at anchors unique to both texts and aligns the
+  pieces on several cores (see comparer.parallel.AnchorSplitComparer).
+
+  profile=True returns {'result', 'profile'} instead, with the engine's per-phase timings
+  and counters; slow profiled compares are also kept in the compare_profiles table.
+
+  phonetic=True grades words that sound like the transcript's ("their" for "there") as
+  mistakes instead of wrong.
+
+  language picks the contractions, number words and accent folding both texts are
+  normalized with (see comparer.languages.SUPPORTED_LANGUAGES).
+
+  positions=True returns {'result', 'positions', 'timestamps'}: per entry, the character
+  offset in actual_transcript and the time of the transcript word it belongs to (see
+  comparer.results.TimestampColumns). With profile=True the 'profile' key is added to it.
+
+  report_degraded=True returns {'result', 'degraded'} (or adds 'degraded' to the profile or
+  positions dict), so callers of the plain list can tell a budget-limited alignment apart.
+  """
+  return _compare(user_input, actual_transcript, timestamps, mode, CompactResult() if compact else None, parallel,
+                  profile, phonetic, language, positions, report_degraded)
+
+
+def _compare(user_input: str, actual_transcript: str, timestamps: Optional[List[float]], mode: str,
+             result: Optional[ResultSink] = None, parallel: bool = False, profile: bool = False,
+             phonetic: bool = False, language: str = DEFAULT_LANGUAGE, positions: bool = False,
+             report_degraded: bool = False):
+  if mode not in COMPARE_MODES:
+    raise ValueError(f"Unknown compare mode: {mode}")
+  if parallel and profile:
+    raise ValueError("Profiling is not available for parallel compares")
+
+  # Timestamped transcripts come from videos and are graded again and again; pastes are not.
+  prepared = prepare_transcript(actual_transcript, timestamps, persist=timestamps is not None, language=language)
+  result = result if result is not None else EntryList()
+  if positions:
+    result = TimestampColumns(prepared.actual, result)
+  if parallel:
+    comparer = AnchorSplitComparer(mode, phonetic=phonetic, language=language)
+  else:
+    comparer = COMPARE_MODES[mode](profile=profile, phonetic=phonetic, language=language)
+  built = comparer.compare_tokens(prepared.user_tokens(user_input), prepared.actual, index=prepared.index,
+                                  result=result)
+  extra = {}
+  if profile:
+    record_slow_compare(comparer.profile, mode, actual_transcript, user_input)
+    extra['profile'] = comparer.profile.to_dict()
+  if report_degraded:
+    extra['degraded'] = result.degraded
+  if not extra:
+    return built
+  if positions:
+    return {**built, **extra}
+  return {'result': built, **extra}
 
-  actual_words = [Word(text=text, timestamp=ts, normalized=normalize_text(text)) for text, ts in zip(actual_transcript.split(), timestamps)]
-  user_words = [Word(text=w, timestamp=0.0, normalized=normalize_text(w)) for w in re.findall(r'\b\w+[\w\']*\b', user_input)]
 
-  comparer = TranscriptionComparerV4Pro()
-  return comparer.compare(user_words, actual_words)
+@anvil.server.callable
+def validate_transcription_timed(user_input: str, segments: List[Dict], start_time: float = None, end_time: float = None,
+                                 band_seconds: float = 8.0, compact: bool = False, language: str = DEFAULT_LANGUAGE,
+                                 positions: bool = False):
+  """
+  Compare against the part of a YouTube transcript (get_youtube_transcript segments) that the
+  student practised, from start_time to end_time in seconds, with time-banded resyncs.
+  positions=True adds the per-entry transcript offsets and timestamps, as in
+  validate_transcription_comparer, so the player can seek to any entry.
+
+  The offsets of compact=True and positions=True point into the segment texts joined by
+  single spaces, which is returned under 'transcript' (alongside the compact or positions
+  keys) for decode_compact_result and for seeking.
+  """
+  actual_transcript, timestamps = interpolate_word_timestamps(segments)
+  prepared = prepare_transcript(actual_transcript, timestamps, persist=True, language=language)
+  actual = prepared.actual.time_slice(start_time, end_time)
+  comparer = TimedComparer(band_seconds=band_seconds, language=language)
+  result = CompactResult() if compact else None
+  if positions:
+    result = TimestampColumns(actual, result)
+  built = comparer.compare_tokens(prepared.user_tokens(user_input), actual, result=result)
+  if compact or positions:
+    return {**built, 'transcript': actual_transcript}
+  return built
+
+
+@anvil.server.callable
+def start_transcription_comparison(actual_transcript: str, language: str = DEFAULT_LANGUAGE) -> Dict:
+  # The checkpoint carries the language to every continue_transcription_comparison call.
+  return IncrementalComparer().start(actual_transcript, language)
+
+
+@anvil.server.callable
+def continue_transcription_comparison(checkpoint: Dict, new_text: str, final: bool = False) -> Dict:
+  # The transcript is found again by the hash in the checkpoint, so only the new text is sent.
+  entries, checkpoint = IncrementalComparer().feed(checkpoint, new_text, final=final)
+  return {'entries': entries, 'checkpoint': checkpoint, 'degraded': checkpoint['degraded']}
 
 
 @anvil.server.callable
-def compare_transcriptions_comparer(user_input: str, official_transcript: str):
-  result = validate_transcription_comparer(user_input, official_transcript)
-
-  html = ""
-  correct = 0
-  mistake = 0
-  missing = 0
-  wrong = 0
-
-  for entry in result:
-    word = entry["text"]
-    wtype = entry["type"]
-    if wtype == "correct":
-      html += f"<span style='color:green'>{word}</span> "
-      correct += 1
-    elif wtype == "mistake":
-      html += f"<span style='color:orange'>{word}</span> "
-      mistake += 1
-    elif wtype == "missing":
-      html += f"<span style='color:blue'>{word}</span> "
-      missing += 1
-    elif wtype == "wrong":
-      html += f"<span style='color:red'>{word}</span> "
-      wrong += 1
-    else:
-      html += word + " "
-
-  total_attempted = correct + mistake + wrong
-  accuracy = round(100 * correct / total_attempted, 1) if total_attempted else 0.0
-
-  return {
-    "html": html.strip(),
-    "stats": {
-      "accuracy": accuracy,
-      "correct": correct,
-      "incorrect": mistake + wrong,
-      "missing": missing
-    }
-  }
+def compare_transcriptions_comparer(user_input: str, official_transcript: str, mode: str = 'greedy',
+                                    language: str = DEFAULT_LANGUAGE):
+  # Adjacent words of one type share a span; the stats are counted while aligning.
+  return _compare(user_input, official_transcript, None, mode, HtmlResult(), language=language)
+
+
+@anvil.server.callable(require_user=True)
+def grade_transcriptions_batch(user_inputs: List[str], actual_transcript: str, timestamps: List[float] = None,
+                               mode: str = 'greedy', max_workers: Optional[int] = None,
+                               language: str = DEFAULT_LANGUAGE) -> List[Dict]:
+  """
+  Grade many submissions against one transcript, which is tokenized and normalized once.
+
+  Returns one {'result', 'stats', 'degraded'} dict per submission, in input order. Large batches are
+  spread over a process pool; if processes are not available the batch runs serially. max_workers
+  is capped at the server's CPU count, and batches over MAX_BATCH_SIZE submissions are rejected.
+  """
+  if mode not in COMPARE_MODES:
+    raise ValueError(f"Unknown compare mode: {mode}")
+  if len(user_inputs) > MAX_BATCH_SIZE:
+    raise ValueError(f"At most {MAX_BATCH_SIZE} submissions can be graded in one batch")
+
+  actual = prepare_transcript(actual_transcript, timestamps, persist=True, language=language).actual
+  return grade_batch(user_inputs, actual, mode, max_workers)
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [os.path.join(ROOT, 'server_code'), os.path.join(ROOT, 'tools')]
+sys.path.append(os.path.join(ROOT, 'client_code'))
+
+# The server modules import the Anvil runtime (anvil-uplink in server_code/requirements.txt).
+# Each test module skips itself when it is missing; a skip raised here would abort the run.
+
+
+@pytest.fixture
+def grade():
+  """grade(user_input, transcript, **engine_options) -> the {'text', 'type'} entries."""
+  import comparer
+
+  def run(user_input, transcript, language=comparer.DEFAULT_LANGUAGE, **options):
+    prepared = comparer.prepare_transcript(transcript, persist=False, language=language)
+    engine = comparer.TranscriptionComparerV4Pro(language=language, **options)
+    return engine.compare_tokens(prepared.user_tokens(user_input), prepared.actual, index=prepared.index)
+  return run
+
+
+@pytest.fixture
+def read():
+  """read(text) -> the normalized token strings of a transcript."""
+  import comparer
+
+  def run(text, language=comparer.DEFAULT_LANGUAGE):
+    actual = comparer.prepare_transcript(text, persist=False, language=language).actual
+    return [actual.vocab.strings[i] for i in actual.ids]
+  return run
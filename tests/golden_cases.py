@@ -0,0 +1,64 @@
+"""
+Curated compares whose engine results are frozen in data/golden_results.json. After an
+intended change in grading, regenerate the file and review its diff:
+
+    python tests/golden_cases.py
+"""
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [os.path.join(ROOT, 'server_code'), os.path.join(ROOT, 'tools')]
+
+import comparer  # noqa: E402
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'golden_results.json')
+
+# name -> (user_input, transcript, language)
+CASES = {
+  'exact': ("The quick brown fox jumps over the lazy dog.", "The quick brown fox jumps over the lazy dog.", 'en'),
+  'typos': ("the quikc brown fox jumsp over teh lazy dog", "The quick brown fox jumps over the lazy dog.", 'en'),
+  'skipped': ("the quick fox over the dog", "The quick brown fox jumps over the lazy dog.", 'en'),
+  'inserted': ("so the quick brown fox um jumps right over the lazy old dog", "The quick brown fox jumps over the lazy dog.", 'en'),
+  'late start': ("over the lazy dog", "The quick brown fox jumps over the lazy dog.", 'en'),
+  'unrelated': ("completely different words here", "The quick brown fox jumps over the lazy dog.", 'en'),
+  'contractions': ("I am sure we'll go, dont you think it's late", "I'm sure we will go, don't you think its late", 'en'),
+  'numbers': ("I have 21 cats and 3.5 dogs since 1984", "I have twenty-one cats and three point five dogs since nineteen eighty-four", 'en'),
+  'counting': ("10 11 12 and 20 20", "ten eleven twelve and twenty twenty", 'en'),
+  'ordinals': ("the 1st and the secnd and the 21st", "the first and the second and the twenty-first", 'en'),
+  'annotations': ("hello everyone welcome back", "[Music] Hello everyone, [Applause] welcome back!", 'en'),
+  'repeats': ("la la la la the end", "la la la the end the end", 'en'),
+  'homophones': ("their going to right four ours", "they're going to write for hours", 'en'),
+  'spanish': ("tengo veintidos anos y vivo en espana", "Tengo veintidós años y vivo en España", 'es'),
+  'french': ("il a vingt et un ans c'est vrai", "Il a vingt-et-un ans, c'est vrai", 'fr'),
+  'german': ("ich bin einundzwanzig gibt es", "Ich bin einundzwanzig, gibt's", 'de'),
+  'portuguese': ("tenho vinte e dois anos", "Tenho vinte e dois anos", 'pt'),
+  'long gap': (" ".join(f"noise{i}" for i in range(40)) + " the end",
+               " ".join(f"word{i}" for i in range(40)) + " the end", 'en'),
+}
+
+ENGINES = {
+  'greedy': lambda language: comparer.TranscriptionComparerV4Pro(language=language),
+  'phonetic': lambda language: comparer.TranscriptionComparerV4Pro(phonetic=True, language=language),
+  'diff': lambda language: comparer.DiffComparer(language=language),
+  'timed': lambda language: comparer.TimedComparer(language=language),
+}
+
+
+def run_case(engine: str, name: str):
+  user_input, transcript, language = CASES[name]
+  prepared = comparer.prepare_transcript(transcript, persist=False, language=language)
+  return ENGINES[engine](language).compare_tokens(prepared.user_tokens(user_input), prepared.actual,
+                                                  index=prepared.index)
+
+
+def golden_results():
+  return {engine: {name: run_case(engine, name) for name in CASES} for engine in ENGINES}
+
+
+if __name__ == '__main__':
+  with open(GOLDEN_PATH, 'w') as f:
+    json.dump(golden_results(), f, indent=1, ensure_ascii=False)
+    f.write('\n')
+  print(f"Wrote {GOLDEN_PATH}")
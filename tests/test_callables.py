@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip('anvil.server')
+
+from TranscriptionService import compare_transcriptions_simple
+
+
+def test_simple_compare_counts_a_skipped_first_word_once():
+  stats = compare_transcriptions_simple("x quick brown fox", "the quick brown fox")['stats']
+  assert stats == {'accuracy': 60.0, 'correct': 3, 'incorrect': 1, 'missing': 1, 'total': 5}
+
+
+def test_simple_compare_counts_skips_after_the_first_match():
+  stats = compare_transcriptions_simple("the quick x fox jumps", "the quick brown fox jumps")['stats']
+  assert stats == {'accuracy': 66.7, 'correct': 4, 'incorrect': 1, 'missing': 1, 'total': 6}
+
+
+def test_timed_compact_result_decodes_against_the_returned_transcript():
+  from compact_result import decode_compact_result
+  from transcription_comparer import validate_transcription_timed
+
+  segments = [{'text': "the quick  brown", 'start': 0.0, 'duration': 3.0},
+              {'text': "fox jumps", 'start': 2.0, 'duration': 2.0}]
+  user_input = "the quick fox jumped"
+  payload = validate_transcription_timed(user_input, segments, compact=True)
+  entries = validate_transcription_timed(user_input, segments)
+  assert payload['transcript'] == "the quick brown fox jumps"
+  assert decode_compact_result(payload, user_input, payload['transcript']) == entries
+
+
+def test_degraded_flag_is_reported_on_request():
+  from transcription_comparer import validate_transcription_comparer
+
+  plain = validate_transcription_comparer("the quick fox", "the quick brown fox")
+  assert validate_transcription_comparer("the quick fox", "the quick brown fox", report_degraded=True) == \
+      {'result': plain, 'degraded': False}
+  with_positions = validate_transcription_comparer("the quick fox", "the quick brown fox", positions=True,
+                                                   report_degraded=True)
+  assert with_positions['result'] == plain and with_positions['degraded'] is False
+
+
+def test_advanced_compare_reports_the_linear_fallback_degrading():
+  from TranscriptionAdvanced import validate_transcription_advanced
+
+  transcript = " ".join(f"word{i}" for i in range(2000))
+  user_input = " ".join(f"other{i}" for i in range(2000))
+  response = validate_transcription_advanced(user_input, transcript, report_degraded=True)
+  assert response['degraded'] is True
+  assert len(response['result']) == 4000
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('anvil.server')
+
+
+@pytest.mark.parametrize('user_input, transcript', [
+  ("Im here", "I'm here"),
+  ("I'm here", "I am here"),
+  ("well see", "we'll see"),
+  ("we will see", "we'll see"),
+  ("I dont know", "I don't know"),
+  ("I do not know", "I don't know"),
+  ("its late", "it's late"),
+  ("it is late", "it's late"),
+  ("can't stop", "cannot stop"),
+])
+def test_contraction_forms_grade_correct(grade, user_input, transcript):
+  assert {entry['type'] for entry in grade(user_input, transcript)} == {'correct'}
+
+
+@pytest.mark.parametrize('user_input, transcript', [
+  ("we will think", "well, I think"),
+  ("we are here", "were here"),
+  ("ill go", "I will go"),
+  ("dont know", "do not know"),
+])
+def test_spelling_without_apostrophe_is_not_the_long_form(grade, user_input, transcript):
+  assert grade(user_input, transcript)[0]['type'] != 'correct'
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'diff'])
+def test_spelling_without_apostrophe_resyncs(engine):
+  import comparer
+  prepared = comparer.prepare_transcript("so I think I don't know what", persist=False)
+  entries = comparer.COMPARE_MODES[engine]().compare_tokens(prepared.user_tokens("so x y z I dont know what"),
+                                                            prepared.actual, index=prepared.index)
+  assert [e['text'] for e in entries if e['type'] == 'correct'][-4:] == ['I', 'dont', 'know', 'what']
+
+
+def test_contraction_without_apostrophe_is_one_entry(grade):
+  assert grade("Im here", "I'm here") == [{'text': 'Im', 'type': 'correct'}, {'text': 'here', 'type': 'correct'}]
+
+
+def test_contraction_collapses_to_one_token(read):
+  assert read("I'm sure we'll go, don't you think") == ['i am', 'sure', 'we will', 'go', 'do not', 'you', 'think']
+  assert read("Im sure") == ['im', 'sure']
+
+
+def test_curly_apostrophe(read):
+  assert read("don’t") == ['do not']
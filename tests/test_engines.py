@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+pytest.importorskip('anvil.server')
+
+import comparer
+from comparer import gapmatrix
+from comparer_differential import generate_cases, graded_words
+from comparer_reference import reference_compare
+from golden_cases import CASES, ENGINES, GOLDEN_PATH, run_case
+
+
+with open(GOLDEN_PATH) as f:
+  GOLDEN = json.load(f)
+
+# Plain-word cases (no contraction or number phrases), where the engines must grade exactly
+# as the old string comparer did.
+REFERENCE_CASES = list(generate_cases(24, seed=11, max_words=300))
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_matches_golden_results(engine, name):
+  assert run_case(engine, name) == GOLDEN[engine][name]
+
+
+@pytest.mark.parametrize('name, user_input, transcript', REFERENCE_CASES, ids=[case[0] for case in REFERENCE_CASES])
+def test_greedy_matches_reference(name, user_input, transcript):
+  prepared = comparer.prepare_transcript(transcript, persist=False)
+  entries = comparer.TranscriptionComparerV4Pro().compare_tokens(prepared.user_tokens(user_input), prepared.actual)
+  assert graded_words(entries) == graded_words(reference_compare(user_input, transcript))
+
+
+class PairwiseGaps(comparer.TranscriptionComparerV4Pro):
+  def fill_field_gaps(self, user_gap, actual_gap, result):
+    self._fill_gap_pairwise(user_gap, actual_gap, result)
+
+
+VARIANTS = {
+  'no cache': lambda: comparer.TranscriptionComparerV4Pro(cache=None),
+  'no budget': lambda: comparer.TranscriptionComparerV4Pro(work_budget=None),
+  'pairwise gaps': lambda: PairwiseGaps(cache=None, work_budget=None),
+}
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_shortcuts_keep_results(variant):
+  for _, user_input, transcript in REFERENCE_CASES:
+    prepared = comparer.prepare_transcript(transcript, persist=False)
+    expected = comparer.TranscriptionComparerV4Pro().compare_tokens(prepared.user_tokens(user_input), prepared.actual)
+    assert VARIANTS[variant]().compare_tokens(prepared.user_tokens(user_input), prepared.actual) == expected
+
+
+def test_gap_matrix_matches_pairwise_fill(monkeypatch):
+  if gapmatrix.np is None:
+    pytest.skip("NumPy is not installed")
+  with_matrix = {name: run_case('greedy', name) for name in CASES}
+  monkeypatch.setattr(gapmatrix, 'np', None)
+  assert {name: run_case('greedy', name) for name in CASES} == with_matrix
+
+
+@pytest.mark.parametrize('user_input, transcript, mistake', [
+  ("I want to go", "I want two go", 'to'),
+  ("far two late", "far too late", 'two'),
+  ("this is four you", "this is for you", 'four'),
+  ("we won the game", "we one the game", 'won'),
+  ("I ate it", "I eight it", 'ate'),
+])
+def test_homophones_of_number_words_are_mistakes(grade, user_input, transcript, mistake):
+  entries = grade(user_input, transcript, phonetic=True)
+  assert [entry['text'] for entry in entries] == user_input.split()
+  assert [entry['text'] for entry in entries if entry['type'] != 'correct'] == [mistake]
+  assert {entry['type'] for entry in entries} == {'correct', 'mistake'}
+
+
+@pytest.mark.parametrize('user_word, actual_word', [
+  ('on', 'in'), ('own', 'an'), ('at', 'it'), ('out', 'eat'), ('men', 'man'), ('moon', 'mean'),
+  ('love', 'live'), ('leave', 'life'), ('live', 'life'), ('bat', 'boat'), ('but', 'bit'),
+])
+def test_look_alike_sound_keys_are_not_homophones(user_word, actual_word):
+  assert not comparer.sounds_alike(user_word, actual_word)
+
+
+def test_short_words_do_not_resync_by_sound():
+  prepared = comparer.prepare_transcript("we sat down in the garden all day", persist=False)
+  engine = comparer.TranscriptionComparerV4Pro(phonetic=True, strategies=(comparer.PhoneticRealign(),))
+  entries = engine.compare_tokens(prepared.user_tokens("we sat on the garden all day"), prepared.actual)
+  assert not [entry for entry in entries if entry['type'] == 'mistake']
+
+
+def test_linear_fallback_charges_fuzzy_comparisons(monkeypatch):
+  actual = ' '.join(f"ka{'lo' * (i % 7)}mi{i}" for i in range(300))
+  user = ' '.join(f"wy{'xu' * (i % 5)}jh{i}" for i in range(300))
+  prepared = comparer.prepare_transcript(actual, persist=False)
+  engine = comparer.TranscriptionComparerV4Pro(
+    strategies=(comparer.GreedyBigramRealign(), comparer.LinearFallbackRealign()), work_budget=20000, cache=None)
+  calls = []
+  is_mistake = engine.is_mistake
+  monkeypatch.setattr(engine, 'is_mistake', lambda *args: calls.append(args) or is_mistake(*args))
+  result = comparer.EntryList()
+  engine.compare_tokens(prepared.user_tokens(user), prepared.actual, result=result)
+  assert result.degraded
+  # Charging only the scan length let this input make over 10000 comparisons.
+  assert len(calls) <= 20000 // comparer.LinearFallbackRealign.FUZZY_SCAN_COST + 2 * len(prepared.actual)
+
+
+def test_anchor_split_shares_one_work_budget():
+  user_input, transcript = REFERENCE_CASES[0][1], REFERENCE_CASES[0][2]
+  prepared = comparer.prepare_transcript(transcript, persist=False)
+  splitter = comparer.AnchorSplitComparer(min_gap=5, max_workers=1, work_budget=10000)
+  bounds = splitter.chunk_bounds(prepared.user_tokens(user_input), prepared.actual)
+  assert len(bounds) > 1
+  assert sum(splitter.chunk_budgets(bounds)) <= 10000
+  assert comparer.AnchorSplitComparer(work_budget=None).chunk_budgets(bounds) == [None] * len(bounds)
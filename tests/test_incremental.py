@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+pytest.importorskip('anvil.server')
+
+import comparer
+from golden_cases import CASES, run_case
+
+# Cases where no resync needs more than the incremental lookahead, so typing word by word
+# must give exactly the full compare.
+TYPED_CASES = ['exact', 'typos', 'skipped', 'contractions', 'numbers', 'counting', 'ordinals', 'annotations',
+               'spanish', 'french', 'german', 'portuguese']
+
+
+def feed_all(chunks, transcript, language):
+  incremental = comparer.IncrementalComparer()
+  checkpoint = incremental.start(transcript, language)
+  entries = []
+  for n, chunk in enumerate(chunks):
+    new_entries, checkpoint = incremental.feed(checkpoint, chunk, final=n == len(chunks) - 1)
+    entries += new_entries
+  return entries, checkpoint
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_single_final_feed_is_the_full_compare(name):
+  user_input, transcript, language = CASES[name]
+  entries, checkpoint = feed_all([user_input], transcript, language)
+  assert entries == run_case('greedy', name)
+  assert checkpoint['emitted'] == len(entries)
+
+
+@pytest.mark.parametrize('name', TYPED_CASES)
+def test_word_by_word_feeds_match_the_full_compare(name):
+  user_input, transcript, language = CASES[name]
+  # Each word arrives in two keystroke batches, so most feeds end in the middle of a word.
+  chunks = []
+  for word in re.findall(r"\S+\s*", user_input):
+    half = len(word) // 2
+    chunks += [word[:half], word[half:]]
+  entries, _ = feed_all([c for c in chunks if c], transcript, language)
+  assert entries == run_case('greedy', name)
+
+
+def test_feeds_leave_the_cached_transcript_vocabulary_alone():
+  user_input, transcript, language = CASES['typos']
+  vocab = comparer.prepare_transcript(transcript, persist=False, language=language).actual.vocab
+  size = len(vocab)
+  feed_all([word + ' ' for word in user_input.split()], transcript, language)
+  assert len(vocab) == size
+
+
+def test_unknown_transcript_is_rejected():
+  incremental = comparer.IncrementalComparer()
+  checkpoint = {**incremental.start("one transcript"), 'transcript': comparer.transcript_hash("another transcript")}
+  with pytest.raises(ValueError):
+    incremental.feed(checkpoint, "words")
+
+
+def test_checkpoint_keeps_the_degraded_flag():
+  transcript = " ".join(f"word{i}" for i in range(300))
+  incremental = comparer.IncrementalComparer(comparer.TranscriptionComparerV4Pro(work_budget=10))
+  checkpoint = incremental.start(transcript)
+  _, checkpoint = incremental.feed(checkpoint, " ".join(f"other{i}" for i in range(30)) + " ")
+  assert checkpoint['degraded']
+  _, checkpoint = incremental.feed(checkpoint, "word299", final=True)
+  assert checkpoint['degraded']
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip('anvil.server')
+
+
+@pytest.mark.parametrize('text, expected', [
+  ("nineteen eighty-four", ['1984']),
+  ("nineteen eighty", ['1980']),
+  ("twenty twenty-four", ['2024']),
+  ("twenty nineteen", ['2019']),
+  ("nineteen oh five", ['1905']),
+  ("two thousand and five", ['2005']),
+  ("two hundred and fifty", ['250']),
+  ("three point five", ['3.5']),
+  ("twenty-first", ['21st']),
+])
+def test_reads_numbers(read, text, expected):
+  assert read(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+  ("ten eleven twelve", ['10', '11', '12']),
+  ("ten twenty thirty forty", ['10', '20', '30', '40']),
+  ("I scored twenty twenty times", ['i', 'scored', '20', '20', 'times']),
+  ("thirty twenty", ['30', '20']),
+])
+def test_counting_is_not_read_as_years(read, text, expected):
+  assert read(text) == expected
+
+
+def test_punctuation_ends_a_number(read):
+  assert read("I was twenty. Twenty years later") == ['i', 'was', '20', '20', 'years', 'later']
+  assert read("one, two hundred") == ['1', '200']
+
+
+@pytest.mark.parametrize('user_input, transcript', [
+  ("10 11 12", "ten eleven twelve"),
+  ("10 20 30 40", "ten twenty thirty forty"),
+  ("I scored 20 20 times", "I scored twenty twenty times"),
+  ("I was 20. 20 years later", "I was twenty. Twenty years later"),
+  ("in 1984", "in nineteen eighty-four"),
+])
+def test_digits_grade_correct(grade, user_input, transcript):
+  assert {entry['type'] for entry in grade(user_input, transcript)} == {'correct'}
+
+
+@pytest.mark.parametrize('user_input, transcript', [
+  ("fourty", "forty"),
+  ("ninty", "ninety"),
+  ("tweleve", "twelve"),
+  ("eigth", "eighth"),
+  ("frist", "first"),
+  ("secnd", "second"),
+])
+def test_misspelled_number_words_are_mistakes(grade, user_input, transcript):
+  assert grade(f"it was {user_input} times", f"it was {transcript} times") == [
+    {'text': 'it', 'type': 'correct'}, {'text': 'was', 'type': 'correct'},
+    {'text': user_input, 'type': 'mistake'}, {'text': 'times', 'type': 'correct'}]
+  assert grade(user_input, transcript) == [{'text': user_input, 'type': 'mistake'}]
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip('anvil.server')
+
+import comparer
+from compact_result import TYPE_NAMES, decode_compact_result
+from golden_cases import CASES, ENGINES
+
+
+def test_type_names_match_the_server():
+  assert TYPE_NAMES == comparer.TYPE_NAMES
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_compact_result_decodes_to_entries(engine, name):
+  user_input, transcript, language = CASES[name]
+  prepared = comparer.prepare_transcript(transcript, persist=False, language=language)
+  make = ENGINES[engine]
+  entries = make(language).compare_tokens(prepared.user_tokens(user_input), prepared.actual)
+  payload = make(language).compare_tokens(prepared.user_tokens(user_input), prepared.actual,
+                                          result=comparer.CompactResult())
+  assert decode_compact_result(payload, user_input, transcript) == entries
+
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip('anvil.server')
+
+from comparer import interpolate_word_timestamps
+
+
+def test_words_are_spread_over_their_segment():
+  text, timestamps = interpolate_word_timestamps([{'text': "one two", 'start': 1.0, 'duration': 2.0},
+                                                  {'text': "three", 'start': 3.0, 'duration': 1.0}])
+  assert text == "one two three"
+  assert timestamps == [1.0, 2.0, 3.0]
+
+
+def test_overlapping_segments_stay_ascending():
+  segments = [{'text': "a b c d", 'start': start, 'duration': 4.0} for start in (0.0, 2.0, 4.0)]
+  _, timestamps = interpolate_word_timestamps(segments)
+  assert timestamps == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 5.0, 6.0, 7.0]
+
+
+def test_out_of_order_segments_never_go_backwards():
+  _, timestamps = interpolate_word_timestamps([{'text': "a b", 'start': 5.0, 'duration': 2.0},
+                                               {'text': "c", 'start': 4.0, 'duration': 1.0}])
+  assert timestamps == sorted(timestamps)
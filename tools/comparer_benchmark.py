@@ -0,0 +1,207 @@
+"""
+Offline benchmark for the transcription comparers.
+
+Generates synthetic transcript / user-input pairs with controlled rates of skipped
+words, inserted words, typos and contractions, runs every comparer engine on them and
+reports throughput, p50/p99 latency and peak memory. Run it from the repository root
+with the server requirements installed (the server modules import anvil.server):
+
+    python tools/comparer_benchmark.py                      # report only
+    python tools/comparer_benchmark.py --save-baseline      # store the numbers
+    python tools/comparer_benchmark.py --check              # fail on regressions
+
+The baseline is machine specific, so store it on the machine that runs the check.
+A run fails when an engine's p50 latency or peak memory for a size is more than
+--margin (default 25%) above the stored baseline; latency changes below
+--min-delta-ms are ignored as timer noise.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server_code'))
+
+import comparer  # noqa: E402
+import TranscriptionAdvanced  # noqa: E402
+import TranscriptionService  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'comparer_benchmark_baseline.json')
+
+SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "su", "ve", "dor", "pa", "li", "ne", "qua", "to", "ber", "sa", "gi"]
+CONTRACTIONS = [("do", "not", "don't"), ("I", "am", "I'm"), ("will", "not", "won't"), ("it", "is", "it's"),
+                ("you", "are", "you're"), ("they", "have", "they've")]
+NUMBERS = [("5", "five"), ("12", "twelve"), ("20", "twenty"), ("3", "three"), ("40", "forty")]
+
+
+class SyntheticCase:
+  def __init__(self, words: int, seed: int, skip_rate: float, insert_rate: float, typo_rate: float,
+               contraction_rate: float, vocabulary_size: int = 4000, contraction_phrase_rate: float = 0.03,
+               number_rate: float = 0.02):
+    rng = random.Random(seed)
+    vocabulary = sorted({''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+                         for _ in range(vocabulary_size)})
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    actual = []
+    user = []
+    while len(actual) < words:
+      roll = rng.random()
+      if roll < contraction_phrase_rate:
+        first, second, short = rng.choice(CONTRACTIONS)
+        actual += [first, second]
+        user += [short] if rng.random() < contraction_rate else [first, second]
+        continue
+      if roll < contraction_phrase_rate + number_rate:
+        digits, spelled = rng.choice(NUMBERS)
+        actual.append(spelled)
+        user.append(digits if rng.random() < 0.5 else spelled)
+        continue
+
+      word = rng.choices(vocabulary, weights)[0]
+      actual.append(word + (rng.choice(",.") if rng.random() < 0.08 else ""))
+      if rng.random() < skip_rate:
+        continue
+      if rng.random() < insert_rate:
+        user.append(rng.choice(vocabulary))
+      if rng.random() < typo_rate and len(word) > 2:
+        i = rng.randrange(len(word))
+        word = word[:i] + rng.choice("aeioust") + word[i + 1:]
+      user.append(word)
+
+    self.words = words
+    self.actual = ' '.join(actual)
+    self.user = ' '.join(user)
+
+
+class Engine:
+  def reset(self):
+    comparer.PREPARED_TRANSCRIPTS.clear()
+    comparer.SIMILARITY_CACHE.clear()
+
+
+class ComparerEngine(Engine):
+  def __init__(self, mode: str):
+    self.mode = mode
+
+  def run(self, user: str, actual: str):
+    prepared = comparer.prepare_transcript(actual, persist=False)
+    engine = comparer.COMPARE_MODES[self.mode]()
+    return engine.compare_tokens(prepared.user_tokens(user), prepared.actual)
+
+
+class AdvancedEngine(Engine):
+  def run(self, user: str, actual: str):
+    # Prepared here, without persisting, so the callable finds it in the LRU and never reaches Data Tables.
+    comparer.prepare_transcript(actual, persist=False)
+    return TranscriptionAdvanced.validate_transcription_advanced(user, actual)
+
+
+class SmartEngine(Engine):
+  def run(self, user: str, actual: str):
+    comparer.prepare_transcript(actual, persist=False)
+    return TranscriptionService.SmartComparer(user, actual).compare()
+
+
+ENGINES = {
+  'comparer-greedy': ComparerEngine('greedy'),
+  'comparer-diff': ComparerEngine('diff'),
+  'advanced': AdvancedEngine(),
+  'smart': SmartEngine(),
+}
+
+
+def percentile(samples, fraction):
+  ordered = sorted(samples)
+  return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(engine, case: SyntheticCase, repeat: int):
+  latencies = []
+  for _ in range(repeat):
+    engine.reset()
+    start = time.perf_counter()
+    engine.run(case.user, case.actual)
+    latencies.append(time.perf_counter() - start)
+
+  engine.reset()
+  tracemalloc.start()
+  engine.run(case.user, case.actual)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  total_words = len(case.user.split()) + len(case.actual.split())
+  p50 = statistics.median(latencies)
+  return {
+    'words_per_sec': round(total_words / p50, 1) if p50 else None,
+    'p50_ms': round(p50 * 1000, 3),
+    'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    'peak_kib': round(peak / 1024, 1),
+  }
+
+
+def find_regressions(report, baseline, margin, min_delta_ms):
+  regressions = []
+  for engine, sizes in report.items():
+    for size, numbers in sizes.items():
+      reference = baseline.get(engine, {}).get(size)
+      if not reference:
+        continue
+      for metric in ('p50_ms', 'peak_kib'):
+        if metric == 'p50_ms' and numbers[metric] - reference.get(metric, 0) < min_delta_ms:
+          continue
+        if reference.get(metric) and numbers[metric] > reference[metric] * (1 + margin):
+          regressions.append(f"{engine} @ {size} words: {metric} {numbers[metric]} vs baseline {reference[metric]}")
+  return regressions
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--sizes', default='100,1000,10000,100000', help="comma-separated transcript lengths in words")
+  parser.add_argument('--engines', default=','.join(ENGINES), help="comma-separated engine names")
+  parser.add_argument('--repeat', type=int, default=5, help="timed runs per engine and size")
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--skip-rate', type=float, default=0.05)
+  parser.add_argument('--insert-rate', type=float, default=0.03)
+  parser.add_argument('--typo-rate', type=float, default=0.05)
+  parser.add_argument('--contraction-rate', type=float, default=0.5)
+  parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+  parser.add_argument('--save-baseline', action='store_true', help="write this run's numbers as the baseline")
+  parser.add_argument('--check', action='store_true', help="exit with status 1 if the baseline regresses")
+  parser.add_argument('--margin', type=float, default=0.25, help="allowed regression, as a fraction")
+  parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                      help="latency increases smaller than this are treated as noise")
+  args = parser.parse_args(argv)
+
+  report = {}
+  for size in [int(s) for s in args.sizes.split(',')]:
+    case = SyntheticCase(size, args.seed, args.skip_rate, args.insert_rate, args.typo_rate, args.contraction_rate)
+    for name in args.engines.split(','):
+      numbers = measure(ENGINES[name], case, args.repeat)
+      report.setdefault(name, {})[str(size)] = numbers
+      print(f"{name:>16} {size:>7} words  {numbers['words_per_sec']:>12} words/s  "
+            f"p50 {numbers['p50_ms']:>10} ms  p99 {numbers['p99_ms']:>10} ms  peak {numbers['peak_kib']:>10} KiB")
+
+  if args.save_baseline:
+    with open(args.baseline, 'w') as f:
+      json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Baseline written to {args.baseline}")
+
+  if args.check:
+    if not os.path.exists(args.baseline):
+      print(f"No baseline at {args.baseline}; run with --save-baseline first")
+      return 1
+    with open(args.baseline) as f:
+      regressions = find_regressions(report, json.load(f), args.margin, args.min_delta_ms)
+    for line in regressions:
+      print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
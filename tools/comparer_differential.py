@@ -0,0 +1,247 @@
+"""
+Differential check of the optimized comparer engines against the pre-package reference.
+
+Runs the reference (tools/comparer_reference.py, the old string comparer frozen as it
+was) and a candidate engine on the same randomized and recorded transcript / user-input
+pairs, each end to end from the raw strings, and stops at the first pair whose results
+differ. That pair is shrunk word by word (delta debugging) to a small input that still
+shows the difference, printed and written as a one-case corpus that --corpus accepts.
+The time each side took, tokenizing included, is summed over all the cases it got
+through, so the report also gives the speedup. Run it from the repository root with the
+server requirements installed:
+
+    python tools/comparer_differential.py                          # greedy vs the reference
+    python tools/comparer_differential.py --candidate diff
+    python tools/comparer_differential.py --candidate mymodule:compare --corpus recorded.json
+
+A candidate is one of CANDIDATES or any "module:function" taking (user_input, transcript)
+and returning the entry list. Only greedy is meant to match the reference exactly; diff,
+timed, parallel and phonetic align differently by design, and the reproducer shows how.
+
+The reference shows transcript words with their punctuation and one entry per whitespace
+word, while the engines collapse contractions and number phrases, so results are compared
+word by word on the reference's normalized text. The generated cases avoid contraction and
+number phrases, whose grading changed on purpose.
+
+A recorded corpus is a JSON list of {'user_input', 'transcript'} objects, the columns of
+the compare_profiles table. Exits with status 1 when the two sides disagree.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server_code'))
+
+import comparer  # noqa: E402
+from comparer_benchmark import SyntheticCase  # noqa: E402
+from comparer_reference import normalize_text, reference_compare  # noqa: E402
+
+DEFAULT_REPRODUCER = 'comparer_reproducer.json'
+
+# Few distinct words, many of them equivalent or alike, so ties and resyncs are frequent. No
+# two of them form a contraction or number phrase ("it is", "twenty one").
+COLLISION_WORDS = ("the a is are has have one two five 5 hello world cat cats bat dog dogs run running ran "
+                   "said say its were don't I'm").split()
+
+
+def engine_candidate(factory):
+  """A candidate that prepares the transcript and runs a fresh factory() engine on it."""
+  def compare(user_input: str, transcript: str):
+    prepared = comparer.prepare_transcript(transcript, persist=False)
+    return factory().compare_tokens(prepared.user_tokens(user_input), prepared.actual, index=prepared.index)
+  return compare
+
+
+CANDIDATES = {
+  'greedy': engine_candidate(comparer.TranscriptionComparerV4Pro),
+  'phonetic': engine_candidate(lambda: comparer.TranscriptionComparerV4Pro(phonetic=True)),
+  'diff': engine_candidate(comparer.DiffComparer),
+  'timed': engine_candidate(comparer.TimedComparer),
+  'parallel': engine_candidate(lambda: comparer.AnchorSplitComparer('greedy')),
+}
+
+
+def load_candidate(name: str):
+  if name in CANDIDATES:
+    return CANDIDATES[name]
+  module, _, attribute = name.partition(':')
+  if not attribute:
+    raise SystemExit(f"Unknown candidate {name}; use one of {', '.join(CANDIDATES)} or module:function")
+  return getattr(importlib.import_module(module), attribute)
+
+
+def collision_case(rng: random.Random):
+  actual = [rng.choice(COLLISION_WORDS) + (rng.choice(',.') if rng.random() < 0.1 else '')
+            for _ in range(rng.randint(1, 250))]
+  user = []
+  for word in actual:
+    roll = rng.random()
+    if roll < 0.1:
+      continue
+    if roll < 0.2:
+      user.append(rng.choice(COLLISION_WORDS))
+    if roll < 0.25:
+      word += 's'
+    user.append(word)
+  if rng.random() < 0.3:
+    cut = rng.randrange(len(user) + 1)
+    user = user[:cut] + user[cut + rng.randint(0, 30):]
+  return ' '.join(user), ' '.join(actual)
+
+
+def generate_cases(count: int, seed: int, max_words: int):
+  """(name, user_input, transcript) triples: half synthetic transcripts, half collision-heavy ones."""
+  rng = random.Random(seed)
+  for n in range(count):
+    if n % 2:
+      user, actual = collision_case(rng)
+      yield f"collision #{n}", user, actual
+    else:
+      case = SyntheticCase(rng.randint(10, max_words), rng.randrange(1 << 30), skip_rate=rng.uniform(0, 0.2),
+                           insert_rate=rng.uniform(0, 0.2), typo_rate=rng.uniform(0, 0.2), contraction_rate=0.0,
+                           vocabulary_size=rng.choice((50, 500, 4000)), contraction_phrase_rate=0.0, number_rate=0.0)
+      yield f"synthetic #{n}", case.user, case.actual
+
+
+def load_corpus(path: str):
+  with open(path) as f:
+    rows = json.load(f)
+  for n, row in enumerate(rows):
+    yield f"{os.path.basename(path)} #{n}", row['user_input'], row['transcript']
+
+
+def graded_words(entries):
+  """(normalized word, type) per word of the entries; the exception's repr if the compare raised."""
+  if not isinstance(entries, list):
+    return entries
+  return [(word, entry['type']) for entry in entries for word in normalize_text(entry['text']).split()]
+
+
+def run_compare(compare, user_input: str, transcript: str):
+  """(graded words or the exception's repr, seconds), timed from the raw strings with cold caches."""
+  comparer.PREPARED_TRANSCRIPTS.clear()
+  comparer.SIMILARITY_CACHE.clear()
+  start = time.perf_counter()
+  try:
+    entries = compare(user_input, transcript)
+  except Exception as e:
+    entries = f"raised {e!r}"
+  return graded_words(entries), time.perf_counter() - start
+
+
+class Differential:
+  def __init__(self, candidate):
+    self.candidate = candidate
+
+  def outcomes(self, user_input: str, transcript: str):
+    """The reference's and the candidate's (graded words, seconds)."""
+    return run_compare(reference_compare, user_input, transcript), run_compare(self.candidate, user_input, transcript)
+
+  def differs(self, user_words, actual_words) -> bool:
+    (expected, _), (got, _) = self.outcomes(' '.join(user_words), ' '.join(actual_words))
+    return expected != got
+
+
+def ddmin(words, still_fails):
+  """
+  Zeller's delta debugging: a 1-minimal sublist of words for which still_fails holds, i.e.
+  removing any single further word makes the failure go away.
+  """
+  granularity = 2
+  while len(words) >= 2:
+    size = len(words) // granularity
+    chunks = [words[i:i + size] for i in range(0, len(words), size)]
+    for i, chunk in enumerate(chunks):
+      if still_fails(chunk):
+        words, granularity = chunk, 2
+        break
+      complement = [w for j, c in enumerate(chunks) if j != i for w in c]
+      if still_fails(complement):
+        words, granularity = complement, max(granularity - 1, 2)
+        break
+    else:
+      if granularity >= len(words):
+        break
+      granularity = min(granularity * 2, len(words))
+  return words
+
+
+def minimize(differential: Differential, user_input: str, transcript: str):
+  """Shrink both sides alternately until neither loses another word."""
+  user, actual = user_input.split(), transcript.split()
+  while True:
+    size = len(user) + len(actual)
+    user = ddmin(user, lambda words: differential.differs(words, actual))
+    actual = ddmin(actual, lambda words: differential.differs(user, words))
+    if len(user) + len(actual) == size:
+      return ' '.join(user), ' '.join(actual)
+
+
+def first_difference(expected, got) -> int:
+  if not isinstance(expected, list) or not isinstance(got, list):
+    return 0
+  for i, (a, b) in enumerate(zip(expected, got)):
+    if a != b:
+      return i
+  return min(len(expected), len(got))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--candidate', default='greedy', help="candidate engine name or module:function")
+  parser.add_argument('--cases', type=int, default=200, help="number of randomized cases")
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--max-words', type=int, default=2000, help="largest synthetic transcript, in words")
+  parser.add_argument('--corpus', action='append', default=[], help="recorded corpus JSON; may be repeated")
+  parser.add_argument('--reproducer', default=DEFAULT_REPRODUCER, help="where to write the minimized input")
+  parser.add_argument('--report', help="write the case count, timings and speedup here as JSON")
+  args = parser.parse_args(argv)
+
+  differential = Differential(load_candidate(args.candidate))
+  cases = [generate_cases(args.cases, args.seed, args.max_words)] + [load_corpus(path) for path in args.corpus]
+
+  checked, reference_seconds, candidate_seconds = 0, 0.0, 0.0
+  mismatch = None
+  for name, user_input, transcript in (case for source in cases for case in source):
+    (expected, ref_s), (got, cand_s) = differential.outcomes(user_input, transcript)
+    if expected != got:
+      mismatch = name, user_input, transcript
+      break
+    checked += 1
+    reference_seconds += ref_s
+    candidate_seconds += cand_s
+
+  speedup = reference_seconds / candidate_seconds if candidate_seconds else None
+  print(f"{checked} cases identical; reference {reference_seconds * 1000:.1f} ms, "
+        f"{args.candidate} {candidate_seconds * 1000:.1f} ms, speedup "
+        f"{f'{speedup:.2f}x' if speedup is not None else 'n/a'}")
+
+  if mismatch is not None:
+    name, user_input, transcript = mismatch
+    print(f"MISMATCH on {name} ({len(user_input.split())} user words, {len(transcript.split())} transcript words); "
+          f"minimizing...")
+    user_input, transcript = minimize(differential, user_input, transcript)
+    (expected, _), (got, _) = differential.outcomes(user_input, transcript)
+    print(f"user_input: {user_input!r}")
+    print(f"transcript: {transcript!r}")
+    print(f"first difference at word {first_difference(expected, got)}")
+    print(f"reference: {expected}")
+    print(f"{args.candidate}: {got}")
+    with open(args.reproducer, 'w') as f:
+      json.dump([{'user_input': user_input, 'transcript': transcript}], f, indent=2)
+    print(f"Reproducer written to {args.reproducer}")
+
+  if args.report:
+    with open(args.report, 'w') as f:
+      json.dump({'candidate': args.candidate, 'cases': checked, 'identical': mismatch is None,
+                 'reference_ms': round(reference_seconds * 1000, 3), 'candidate_ms': round(candidate_seconds * 1000, 3),
+                 'speedup': round(speedup, 3) if speedup is not None else None}, f, indent=2)
+  return 1 if mismatch is not None else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
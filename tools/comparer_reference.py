@@ -0,0 +1,189 @@
+"""
+The string comparer as it was before the comparer package: whitespace tokens, per-word
+regex normalization, equivalence looked up word by word and difflib for mistakes. It is
+kept here, frozen, as the reference that tools/comparer_differential.py checks the
+optimized engines against; do not optimize it.
+
+The one change from the original is in are_equivalent, whose direct-equality check was
+unreachable: equal words are equivalent here, as they have been on the server since the
+equivalence index was introduced.
+"""
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List
+
+from transcription_equivalents import ABBREVIATION_EQUIVALENTS
+
+NUMBER_WORDS = [
+  "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+  "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen", "twenty",
+  "twenty-one", "twenty-two", "twenty-three", "twenty-four", "twenty-five", "twenty-six", "twenty-seven", "twenty-eight", "twenty-nine", "thirty",
+  "thirty-one", "thirty-two", "thirty-three", "thirty-four", "thirty-five", "thirty-six", "thirty-seven", "thirty-eight", "thirty-nine", "forty",
+  "forty-one", "forty-two", "forty-three", "forty-four", "forty-five", "forty-six", "forty-seven", "forty-eight", "forty-nine", "fifty",
+  "fifty-one", "fifty-two", "fifty-three", "fifty-four", "fifty-five", "fifty-six", "fifty-seven", "fifty-eight", "fifty-nine", "sixty",
+  "sixty-one", "sixty-two", "sixty-three", "sixty-four", "sixty-five", "sixty-six", "sixty-seven", "sixty-eight", "sixty-nine", "seventy",
+  "seventy-one", "seventy-two", "seventy-three", "seventy-four", "seventy-five", "seventy-six", "seventy-seven", "seventy-eight", "seventy-nine", "eighty",
+  "eighty-one", "eighty-two", "eighty-three", "eighty-four", "eighty-five", "eighty-six", "eighty-seven", "eighty-eight", "eighty-nine", "ninety",
+  "ninety-one", "ninety-two", "ninety-three", "ninety-four", "ninety-five", "ninety-six", "ninety-seven", "ninety-eight", "ninety-nine", "one hundred"
+]
+NUMBERS_EQUIVALENTS = {}
+for i in range(1, 101):
+  NUMBERS_EQUIVALENTS[str(i)] = [str(i), NUMBER_WORDS[i-1]]
+  NUMBERS_EQUIVALENTS[NUMBER_WORDS[i-1]] = [str(i), NUMBER_WORDS[i-1]]
+
+
+def are_equivalent(word1: str, word2: str) -> bool:
+  w1 = word1.lower()
+  w2 = word2.lower()
+  if w1 == w2:
+    return True
+  for group in ABBREVIATION_EQUIVALENTS.values():
+    if w1 in group and w2 in group:
+      return True
+  if w1 in NUMBERS_EQUIVALENTS and w2 in NUMBERS_EQUIVALENTS[w1]:
+    return True
+  return w2 in NUMBERS_EQUIVALENTS and w1 in NUMBERS_EQUIVALENTS[w2]
+
+
+@dataclass
+class Word:
+  text: str
+  timestamp: float
+  normalized: str = ""
+
+
+class ReferenceComparer:
+  def __init__(self, mistake_threshold: float = 0.75, window_size: int = 20, max_search: int = 200):
+    self.mistake_threshold = mistake_threshold
+    self.window_size = window_size
+    self.max_search = max_search
+
+  def compare(self, user_words: List[Word], actual_words: List[Word]) -> List[Dict[str, str]]:
+    result = []
+    user_idx = 0
+    actual_idx = 0
+    matched_once = False
+
+    while user_idx < len(user_words) and actual_idx < len(actual_words):
+      if are_equivalent(user_words[user_idx].normalized, actual_words[actual_idx].normalized):
+        if not matched_once and actual_idx > 0:
+          for idx in range(actual_idx):
+            result.append({'text': actual_words[idx].text, 'type': 'missing'})
+        matched_once = True
+        result.append({'text': user_words[user_idx].text, 'type': 'correct'})
+        user_idx += 1
+        actual_idx += 1
+        continue
+
+      if self.is_mistake(user_words[user_idx].normalized, actual_words[actual_idx].normalized):
+        if not matched_once and actual_idx > 0:
+          for idx in range(actual_idx):
+            result.append({'text': actual_words[idx].text, 'type': 'missing'})
+        matched_once = True
+        result.append({'text': user_words[user_idx].text, 'type': 'mistake'})
+        user_idx += 1
+        actual_idx += 1
+        continue
+
+      last_result_len = len(result)
+      user_idx, actual_idx = self.realign_with_dubles(user_words, user_idx, actual_words, actual_idx, result, matched_once)
+
+      if len(result) == last_result_len:
+        result.append({'text': user_words[user_idx].text, 'type': 'wrong'})
+        result.append({'text': actual_words[actual_idx].text, 'type': 'missing'})
+        user_idx += 1
+        actual_idx += 1
+
+    while user_idx < len(user_words):
+      result.append({'text': user_words[user_idx].text, 'type': 'wrong'})
+      user_idx += 1
+
+    while actual_idx < len(actual_words):
+      result.append({'text': actual_words[actual_idx].text, 'type': 'missing'})
+      actual_idx += 1
+
+    return result
+
+  def realign_with_dubles(self, user_words, user_start_idx, actual_words, actual_start_idx, result, matched_once):
+    user_new_world = user_words[user_start_idx:]
+    actual_target = actual_words[actual_start_idx:]
+    user_dubles = self.generate_dubles(user_new_world)
+
+    for user_offset, duble_user in enumerate(user_dubles):
+      for window_start in range(0, min(len(actual_target), self.max_search), self.window_size):
+        window_end = min(window_start + self.window_size, len(actual_target))
+        window = actual_target[window_start:window_end]
+        target_dubles = self.generate_dubles(window)
+
+        for target_offset, duble_target in enumerate(target_dubles):
+          if self.are_dubles_equivalent(duble_user, duble_target):
+            full_target_start_idx = actual_start_idx + window_start + target_offset
+
+            if not matched_once and full_target_start_idx > 0:
+              for idx in range(actual_start_idx, full_target_start_idx):
+                result.append({'text': actual_words[idx].text, 'type': 'missing'})
+
+            self.fill_field_gaps(
+              user_words[user_start_idx:user_start_idx + user_offset],
+              actual_words[actual_start_idx:full_target_start_idx],
+              result
+            )
+
+            for w in duble_user:
+              result.append({'text': w.text, 'type': 'correct'})
+            return user_start_idx + user_offset + 2, full_target_start_idx + 2
+
+    return user_start_idx, actual_start_idx
+
+  def generate_dubles(self, words: List[Word]) -> List[List[Word]]:
+    return [[words[i], words[i + 1]] for i in range(len(words) - 1)]
+
+  def are_dubles_equivalent(self, duble1: List[Word], duble2: List[Word]) -> bool:
+    return all(are_equivalent(w1.normalized, w2.normalized) for w1, w2 in zip(duble1, duble2))
+
+  def fill_field_gaps(self, user_gap: List[Word], actual_gap: List[Word], result: List[Dict[str, str]]):
+    user_used = [False] * len(user_gap)
+
+    for aw in actual_gap:
+      matched = False
+      for i, uw in enumerate(user_gap):
+        if not user_used[i] and are_equivalent(uw.normalized, aw.normalized):
+          result.append({'text': uw.text, 'type': 'correct'})
+          user_used[i] = True
+          matched = True
+          break
+      if not matched:
+        for i, uw in enumerate(user_gap):
+          if not user_used[i] and self.is_mistake(uw.normalized, aw.normalized):
+            result.append({'text': uw.text, 'type': 'mistake'})
+            user_used[i] = True
+            matched = True
+            break
+      if not matched:
+        result.append({'text': aw.text, 'type': 'missing'})
+
+    for i, used in enumerate(user_used):
+      if not used:
+        result.append({'text': user_gap[i].text, 'type': 'wrong'})
+
+  def is_mistake(self, user_norm: str, actual_norm: str) -> bool:
+    return SequenceMatcher(None, user_norm, actual_norm).ratio() >= self.mistake_threshold
+
+
+def normalize_text(text):
+  text = re.sub(r'\[.*?\]', '', text)
+  text = re.sub(r'[^\w\s]', '', text)
+  text = re.sub(r'\s+', ' ', text).strip().lower()
+  return text
+
+
+def reference_compare(user_input: str, actual_transcript: str) -> List[Dict[str, str]]:
+  """The old validate_transcription_comparer, from the raw strings to the entry list."""
+  words = actual_transcript.split()
+  total_duration = len(words) / 2
+  timestamps = [i * (total_duration / len(words)) for i in range(len(words))]
+
+  actual_words = [Word(text=text, timestamp=ts, normalized=normalize_text(text)) for text, ts in zip(words, timestamps)]
+  user_words = [Word(text=w, timestamp=0.0, normalized=normalize_text(w)) for w in re.findall(r'\b\w+[\w\']*\b', user_input)]
+  return ReferenceComparer().compare(user_words, actual_words)